@@ -2,6 +2,7 @@ from .store import Store
 
 import pandas as pd
 import copy
+import os
 
 class DataSet(object):
     def __init__(self, met_name, obs_name, name=None, translator=None, pather=None):
@@ -89,6 +90,11 @@ class DataSet(object):
     def stages(self):
         return self.obsdf.columns.tolist()
 
+    def feature_path(self, station=None):
+        # directory for data derived from the weather of the station (i.e. feature cache) next to its input
+        station = self.met_station if station is None else station
+        return os.path.join(self.store.path('met'), '{}.features'.format(self.met_name), str(station))
+
     # return corresponding weather / observation to be used in the model
 
     def weather(self, station=None):
@@ -12,6 +12,9 @@ class AbstractStore(object):
         self.pather = pather
         return self
 
+    def path(self, kind):
+        return self.pather.path('df/{}'.format(kind))
+
     def _filename(self, kind, basename, ext):
         return self.pather.filename('df/{}'.format(kind), basename, ext)
 
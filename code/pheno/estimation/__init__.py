@@ -1,8 +1,8 @@
-__all__ = ['base', 'gd', 'cf', 'beta', 'dts', 'sigmoid', 'tp', 'spm', 'am', 'reg', 'ensemble', 'mean']
+__all__ = ['base', 'season', 'feature', 'kernel', 'optimize', 'gd', 'cf', 'beta', 'dts', 'sigmoid', 'tp', 'spm', 'am', 'reg', 'ensemble', 'mean']
 
 from .base import Estimator
 from .gd import GrowingDegree, GrowingDegreeDay
-from .cf import ChillingForce
+from .cf import ChillingForce, ChillingForceDay
 from .beta import BetaFunc
 from .dts import StandardTemperature
 from .sigmoid import SigmoidFunc
@@ -1,8 +1,9 @@
-from .base import Estimator, EstimationError
+from .base import Estimator, EstimationError, BATCH_SIZE, STATUS_OK, STATUS_NO_OBSERVATION, STATUS_NOT_REACHED
+from .kernel import accumulate, crossing, NOT_MATCHED
 
 import numpy as np
-import pandas as pd
 import datetime
+import collections
 
 # Murray et al., 1989
 # Fu et al., 2012
@@ -37,11 +38,70 @@ class AlternatingModel(Estimator):
         # fix forcing start date to be January 1st
         return datetime.date(year, 1, 1)
 
+    @property
+    def _vectorized(self):
+        return True
+
+    def _estimates_batch(self, years, coeffs):
+        # chill counts only depend on Tc (up to the distinct temperatures of the season) and forcing only on
+        # Tb, so both are shared by coefficient sets differing in (Fa, Fb, Fr) which broadcast over them
+        size = len(coeffs['Fa'])
+        season, rows, h0, h1, valid = self._season_batch(years, coeffs, size)
+        est = np.full(valid.shape, np.nan)
+        if valid.any():
+            a, b = h0[valid].min(), h1[valid.any(axis=0)].max() + 1
+            T = season.tavg[rows, a:b]
+            J = season.julian[rows, a:b]
+            h = np.arange(a, b)
+            y = np.arange(len(years))
+            d = [(self._forcing_start_date(yr, {}) - season.start_dates[r]).days for yr, r in zip(years, rows)]
+            sd = season.openings[rows, np.where(valid.any(axis=0), d, 0)]
+            chilling = (h >= h0[0, :, None]) & (h <= h1[:, None])
+            outside = (h < sd[:, None]) | (h > h1[:, None]) | np.isnan(T)
+
+            def chill(k):
+                # hours (steps) at or below Tc counted from the start of each clip
+                return np.cumsum((T <= season.levels[k-1]) & chilling if k > 0 else np.zeros(T.shape, dtype=bool), axis=-1, dtype=np.int32)
+
+            def force(Tb):
+                # forcing accumulated from the forcing start date
+                F = np.clip(T - Tb, 0, None) / 24
+                F[outside] = 0.
+                if season.step != 1:
+                    F *= season.step
+                return np.cumsum(F, axis=-1)
+
+            key = (id(season), tuple(years))
+            Tc = np.searchsorted(season.levels, coeffs['Tc'], side='right')
+            Tb = np.asarray(coeffs['Tb'], dtype=float)
+            groups = collections.defaultdict(list)
+            for s in range(size):
+                groups[Tc[s], Tb[s]].append(s)
+            n = max(1, BATCH_SIZE // max(T.size, 1))
+            for (k, tb), index in groups.items():
+                C = self._memo((key, 'Tc', k), lambda: chill(k))
+                F = self._memo((key, 'Tb', tb), lambda: force(tb))
+                for i in range(0, len(index), n):
+                    s = np.array(index[i:i+n])
+                    Fa, Fb, Fr = [np.asarray(coeffs[c], dtype=float)[s, None] for c in ('Fa', 'Fb', 'Fr')]
+                    with np.errstate(over='ignore', invalid='ignore'):
+                        # requirement of every chill count, gathered for every hour
+                        Rf = Fa + Fb * np.exp(Fr * (np.arange(C[:, -1].max() + 1) * season.step))
+                    Rf = np.take(Rf, C, axis=1)
+                    t = crossing(F - Rf, 0., outside)
+                    est[s] = np.where(t != NOT_MATCHED, J[y, np.clip(t, 0, None)], np.nan)
+        status = np.where(np.isnan(est), STATUS_NOT_REACHED, STATUS_OK)
+        status[~valid] = STATUS_NO_OBSERVATION
+        est[status != STATUS_OK] = np.nan
+        return est, status
+
     def _estimate(self, year, met, coeff):
         T = met.tavg
 
         Tc = coeff['Tc']
-        Rc = (T <= Tc).cumsum()
+        Rc = np.cumsum(T <= Tc)
+        if met.step != 1:
+            Rc = Rc * met.step
 
         a = coeff['Fa']
         b = coeff['Fb']
@@ -49,10 +109,9 @@ class AlternatingModel(Estimator):
         Rf = a + b * np.exp(r * Rc)
 
         Tb = coeff['Tb']
-        sd = self._forcing_start_date(year, coeff)
-        F = (T[sd:] - Tb).clip(lower=0) / 24
-        aux = pd.concat({
-            'Dd': F,
-            'Cd': F.cumsum(),
-        }, axis=1)
-        return self._match(aux['Cd'] - Rf, 0)
+        sd = met.offset(self._forcing_start_date(year, coeff))
+        F = np.clip(T[sd:] - Tb, 0, None) / 24
+        if met.step != 1:
+            F = F * met.step
+        # requirement changing with chill is matched at whole hours
+        return sd + self._match(accumulate(F) - Rf[sd:], 0, continuous=False)
@@ -1,5 +1,9 @@
 from ..data.dataset import DataSet
 from ..data import path
+from .season import Season
+from .feature import FeatureCache
+from . import kernel
+from . import optimize
 
 import numpy as np
 import scipy.optimize
@@ -7,10 +11,15 @@ import pandas as pd
 import multiprocessing as mp
 import datetime
 import itertools
+import functools
+import contextlib
 import collections
 import copy
 import random
 import string
+import tempfile
+import shutil
+import os
 
 VALID_CHARS = frozenset("-_.() %s%s" % (string.ascii_letters, string.digits))
 def _slugify(v):
@@ -23,6 +32,38 @@ MASK_DATETIME = None
 MASK_JULIAN = 0
 RESIDUAL_OBSERVATION_ERROR = -365.
 RESIDUAL_ESTIMATION_ERROR = 365.
+# status of each year in batched estimates
+STATUS_OK = 0
+STATUS_NO_OBSERVATION = 1 # observation or weather is missing
+STATUS_NOT_REACHED = 2
+STATUS_INVALID_COEFF = 3
+# number of hourly values evaluated at once by batch estimation
+BATCH_SIZE = 2**18
+# number of arrays derived from seasons kept by each estimator
+MEMO_SIZE = 32
+# time steps estimators run on
+RESOLUTIONS = ('hourly', 'daily')
+
+# estimator held by each calibration worker process
+_worker = None
+
+def _initialize_worker(estimator, *args):
+    global _worker
+    _worker = (estimator, args)
+
+def _evaluate_worker(X):
+    estimator, args = _worker
+    return estimator._costs(X, *args)
+
+def _search_worker(task):
+    estimator, args = _worker
+    return optimize.local_search(lambda x: estimator._costs(np.array([x]), *args)[0], *task)
+
+def _calibrate_worker(estimator, years, kwargs):
+    return estimator.calibrate(years, False, False, **kwargs)
+
+def _evaluate_pool(pool, X, workers):
+    return np.concatenate(pool.map(_evaluate_worker, np.array_split(X, min(workers, len(X)))))
 
 class ObservationError(Exception):
     pass
@@ -31,13 +72,29 @@ class EstimationError(Exception):
     pass
 
 class Estimator(object):
-    def __init__(self, dataset, coeff=None):
+    def __init__(self, dataset, coeff=None, resolution='hourly', features=None, continuous=False):
+        if resolution not in RESOLUTIONS:
+            raise ValueError("resolution '{}' is not one of {}".format(resolution, RESOLUTIONS))
+        self.resolution = resolution
+        # requirements met in between hours by linear interpolation, making costs piecewise smooth
+        self.continuous = continuous
+        # local minima found by the last multistart calibration
+        self.basins = None
+        # coefficient draws of the last posterior calibration
+        self.posterior = None
+        if features is True:
+            # cache next to the weather input of the dataset
+            features = FeatureCache(dataset.feature_path())
+        self.features = features
         self._dataset = dataset
         self._mets = dataset.weather()
         self._obss = dataset.observation()
         self._sds = dataset.start_dates()
         self._edo = 150 # 150 days after new year (around end of May)
         self._calibrate_years = None
+        self._cache = {}
+        self._cache_mets = self._mets
+        self._lookup = True # evaluate responses per distinct temperature on quantized weather
         if coeff is None:
             coeff = {}
         self._coeff = coeff
@@ -99,7 +156,86 @@ class Estimator(object):
     def end_date(self, year, coeff):
         return datetime.date(year, 1, 1) + datetime.timedelta(days=self._edo)
 
+    def _cached(self, key, func):
+        # memoize values derived from weather until it gets replaced (i.e. analyze_sensitivity)
+        if self._cache_mets is not self._mets:
+            self._cache = {}
+            self._cache_mets = self._mets
+        try:
+            return self._cache[key]
+        except KeyError:
+            value = self._cache[key] = func()
+            return value
+
+    def _memo(self, key, func):
+        # arrays derived from seasons for recently used keys, dropping the least recently used; worker
+        # processes rebuild them instead of unpickling
+        memo = self._cached('memo', collections.OrderedDict)
+        try:
+            memo.move_to_end(key)
+            return memo[key]
+        except KeyError:
+            value = memo[key] = func()
+            if len(memo) > MEMO_SIZE:
+                memo.popitem(last=False)
+            return value
+
+    @property
+    def _season_offset(self):
+        # earliest start date supported by Ds (days offset) without rebuilding the season
+        try:
+            return int(self.options()['bounds'][self.coeff_names.index('Ds')][0])
+        except:
+            return 0
+
+    def _season_start_date(self, year, offset):
+        d = self.start_date(year, {})
+        if self._sds is None and 'Ds' in self.coeff_names:
+            d = min(d, datetime.date(year, 1, 1) + datetime.timedelta(days=offset))
+        return d
+
+    @property
+    def _diurnal(self):
+        # steps per day sampling the diurnal cycle at daily resolution; 1 takes the daily mean, enough for
+        # models already working on daily minimum / maximum temperature
+        return 8
+
+    def _season_key(self, offset, resolution=None):
+        return ('season', self._edo, offset, resolution or self.resolution)
+
+    def _season(self, offset=None):
+        if offset is None:
+            offset = self._cache.get('season_offset', self._season_offset)
+        else:
+            offset = min(offset, self._cache.get('season_offset', self._season_offset))
+
+        def build():
+            years = []
+            for y in self._years(None, skip_observation_check=True):
+                try:
+                    self._season_start_date(y, offset)
+                except:
+                    continue
+                years.append(y)
+            return Season(self._mets, years,
+                start_date=lambda y: self._season_start_date(y, offset),
+                end_date=lambda y: self.end_date(y, {}),
+            )
+        if self.resolution == 'daily':
+            hourly = build
+            build = lambda: self._cached(self._season_key(offset, 'hourly'), hourly).daily(self._diurnal)
+        season = self._cached(self._season_key(offset), build)
+        self._cache['season_offset'] = offset
+        return season
+
     def _clip(self, year, coeff, skip_range_check=False):
+        start_date = self.start_date(year, coeff)
+        season = self._season()
+        if not season.covers(year, start_date):
+            season = self._season((start_date - datetime.date(year, 1, 1)).days)
+        return season.clip(year, start_date, self.end_date(year, coeff), skip_range_check)
+
+    def _clip_frame(self, year, coeff, skip_range_check=False):
         t0 = datetime.datetime.combine(self.start_date(year, coeff), datetime.time(0))
         t1 = datetime.datetime.combine(self.end_date(year, coeff), datetime.time(23))
         tz = self._mets.index.tz
@@ -113,11 +249,11 @@ class Estimator(object):
         return df
 
     def _years(self, years, skip_observation_check=False):
-        mety = self._mets.dropna().reset_index().timestamp.dt.year.unique()
+        mety = self._cached('mety', lambda: self._mets.dropna().reset_index().timestamp.dt.year.unique())
         if skip_observation_check:
             defy = mety
         else:
-            obsy = self._obss.dropna().reset_index().year.unique()
+            obsy = self._cached('obsy', lambda: self._obss.dropna().reset_index().year.unique())
             defy = np.intersect1d(mety, obsy, assume_unique=True)
 
         def parse(y, allow_default=False):
@@ -171,21 +307,91 @@ class Estimator(object):
         return MASK_JULIAN if julian else MASK_DATETIME
 
     # estimation
-    def _match(self, ts, value, descending=False):
-        ts = ts.dropna()
-        if descending:
-            ts = -ts
-            value = -value
-        i = ts.searchsorted(value)[0]
-        try:
-            return ts.index[i]
-        except:
+    def _match(self, cumulative, value, descending=False, start=0, continuous=None):
+        # offsets of intermediate phases stay whole hours (continuous=False)
+        if continuous is None:
+            continuous = self.continuous
+        i = kernel.match(cumulative, value, descending, start, continuous)
+        if i == kernel.NOT_MATCHED:
             raise EstimationError("requirement '{}' cannot be matched".format(value))
+        return i
 
     def _estimate(self, year, met, coeff):
-        #return self._match(met.ix[:, -1], 1.0)
+        # return hour offset from the beginning of clipped weather
+        #return self._match(kernel.accumulate(met.tavg), 1.0)
         raise NotImplementedError
 
+    def _respond(self, met, f):
+        # hourly response f(T) of clipped weather, through the season lookup table when it pays off; at
+        # daily resolution, scaled to the hours each step stands for
+        if self._lookup and met.season.quantized:
+            r = met.lookup(f)
+        else:
+            r = f(met.tavg)
+        return r if met.step == 1 else r * met.step
+
+    def _timestamp(self, met, t):
+        return met.timestamp(t)
+
+    # feature cache
+    @property
+    def _features(self):
+        # degrees accumulated from a single response that a feature cache can look up instead, as
+        # {name: (response, coeff names)}; estimators share the curves of responses with the same name
+        return {}
+
+    @property
+    def _featured(self):
+        return self._features if self.features is not None else {}
+
+    def _feature_response(self, response, coeff):
+        # response f(T) of scalar coefficients
+        coeffs = {k: np.array([v]) for k, v in coeff.items()}
+        return lambda T: self._rates(T, coeffs).reshape(np.shape(T))
+
+    def _snap(self, name, value):
+        # coefficient (or array of them) on the calibration grid, which the feature cache is keyed by
+        g = self.options()['grid'][self.coeff_names.index(name)]
+        return np.round(g.start + np.round((np.asarray(value, dtype=float) - g.start) / g.step) * g.step, 10)
+
+    def _snapped(self, coeff):
+        # coefficients as estimated with the feature cache, i.e. response coefficients snapped to the grid
+        coeff = dict(coeff)
+        for response, names in self._featured.values():
+            coeff.update({k: float(self._snap(k, coeff[k])) for k in names if k in coeff})
+        return coeff
+
+    def _feature_curve(self, season, name, coeff):
+        # cumulative degrees over every season row (zero-filled where missing) of snapped coefficients
+        response, names = self._featured[name]
+        c = collections.OrderedDict((k, float(self._snap(k, coeff[k]))) for k in names)
+        return self.features.curve(season, response, list(c.values()), self._feature_response(response, c))
+
+    def _feature(self, met, name, coeff, missing=np.nan):
+        # cumulative degrees of the clip from the feature cache, None for degrees not looked up; missing
+        # hours are NaN as accumulate() gives unless `missing` is None
+        if name not in self._featured:
+            return None
+        curve = self._feature_curve(met.season, name, coeff)[met.row]
+        c = np.array(curve[met.start:met.stop]) - (curve[met.start - 1] if met.start > 0 else 0.)
+        if missing is not None:
+            c[np.isnan(met.tavg)] = missing
+        return c
+
+    def _feature_batch(self, season, rows, a, b, h0, name, coeffs):
+        # cumulative degrees in (s, Y, b-a) from the feature cache, counted from the first hour h0 (s, Y) of
+        # each clip as a difference of the season curve
+        c = np.empty(h0.shape + (b - a,))
+        for i in range(len(h0)):
+            curve = self._feature_curve(season, name, {k: v[i] for k, v in coeffs.items()})
+            base = np.where(h0[i] > 0, curve[rows, np.clip(h0[i] - 1, 0, None)], 0.)
+            np.subtract(curve[rows, a:b], base[:, None], out=c[i])
+        return c
+
+    def _julian_at(self, met, t, year):
+        # julian day of an hour offset looked up from the season instead of formatting a timestamp
+        return met.julian(t)
+
     def estimate(self, year, coeff=None, julian=False, skip_range_check=False):
         if coeff is None:
             coeff = self._coeff
@@ -196,11 +402,11 @@ class Estimator(object):
         except:
             #HACK: allow masking for exceptions on missing data
             raise ObservationError("weather cannot be clipped for '{}'".format(year))
-        t = self._estimate(year, met, coeff).to_pydatetime()
+        t = self._estimate(year, met, coeff)
         if julian:
-            return self._julian(t, year)
+            return self._julian_at(met, t, year)
         else:
-            return t
+            return self._timestamp(met, t).to_pydatetime()
 
     def estimate_safely(self, year, coeff=None, julian=False, skip_range_check=False):
         try:
@@ -223,16 +429,252 @@ class Estimator(object):
         ests = np.ma.masked_values(s, self._mask(julian))
         return pd.Series(ests).dropna()
 
+    def posterior_estimates(self, years, draws=None):
+        # julian estimates in (draws, years) for every coefficient set drawn from the posterior
+        if draws is None:
+            draws = self.posterior
+        years = self._years(years, skip_observation_check=True)
+        coeffs = {k: draws[k].values.astype(float) for k in draws.columns if k in self.coeff_names}
+        if self._vectorized:
+            est = self._estimates_batch(years, coeffs)[0]
+        else:
+            est = np.array([[self.estimate_safely(y, self._dictify(c), julian=True) for y in years] for c in draws[list(coeffs)].to_dict('records')])
+            est[est == self._mask(julian=True)] = np.nan
+        return np.ma.masked_invalid(est)
+
+    # batch estimation
+    @property
+    def _vectorized(self):
+        # whether _estimates_batch() can evaluate many coefficient sets at once
+        return False
+
+    @property
+    def _requirement(self):
+        # name of accumulation requirement coeff for threshold models
+        return None
+
+    def _rates(self, T, coeffs):
+        # hourly rates in (S, Y, H) for S coefficient sets on (Y, H) season weather
+        raise NotImplementedError
+
+    def _season_response(self, season, rows, a, b, f):
+        # response f(T) in (S, Y, b-a) of (Y, H) weather between hours a and b of season rows
+        if self._lookup and season.quantized:
+            # response of distinct temperatures as a single row, then gathered for every hour
+            r = f(season.levels[None, :])
+            return np.take(r[:, 0], season.inverse[rows, a:b], axis=1)
+        return f(season.tavg[rows, a:b])
+
+    def _season_rates(self, season, rows, a, b, coeffs):
+        # hourly rates in (S, Y, b-a) between hours a and b of season rows
+        return self._season_response(season, rows, a, b, lambda T: self._rates(T, coeffs))
+
+    def _season_degrees(self, season, rows, a, b, coeffs, skip=()):
+        # hourly rates by name for models accumulating more than one kind of degrees, except skipped ones
+        return {} if 'D' in skip else {'D': self._season_rates(season, rows, a, b, coeffs)}
+
+    def _cumulate(self, degrees, coeffs):
+        # cumulative degrees by name from rates zeroed outside of clips
+        return {k: np.cumsum(v, axis=-1, out=v) for k, v in degrees.items()}
+
+    def _invalid(self, coeffs):
+        # coefficient sets (S,) that can never reach the requirement
+        return np.zeros(len(next(iter(coeffs.values()))), dtype=bool)
+
+    def _start_days(self, season, rows, years, available, coeffs, size):
+        if self._sds is None and 'Ds' in self.coeff_names:
+            jan1 = np.array([(datetime.date(y, 1, 1) - season.start_dates[r]).days for y, r in zip(years, rows)])
+            return jan1[None, :] + np.trunc(coeffs['Ds']).astype(int)[:, None]
+        d = [(self.start_date(y, {}) - season.start_dates[r]).days if a else 0 for y, r, a in zip(years, rows, available)]
+        return np.tile(d, (size, 1))
+
+    def _season_batch(self, years, coeffs, size):
+        if self._sds is None and 'Ds' in coeffs:
+            season = self._season(int(np.trunc(np.min(coeffs['Ds']))))
+        else:
+            season = self._season()
+        rows = np.array([season.rows.get(y, -1) for y in years], dtype=int)
+        available = rows >= 0
+        rows[~available] = 0
+        d0 = self._start_days(season, rows, years, available, coeffs, size)
+        d1 = np.array([(self.end_date(y, {}) - season.start_dates[r]).days for y, r in zip(years, rows)], dtype=int)
+        days = np.array(season.days, dtype=int)[rows] if len(season.years) else np.zeros(len(years), dtype=int)
+        valid = available & (0 <= d0) & (d0 <= d1) & (d1 < days)
+        h0 = season.openings[rows, np.where(valid, d0, 0)]
+        h1 = season.closings[rows, np.where(valid.any(axis=0), d1, 0)]
+        valid &= season.mask[rows, h0] & season.mask[rows, h1]
+        return season, rows, h0, h1, valid
+
+    def _accumulate_batch(self, years, coeffs, size, batch=None):
+        # cumulative rates in chunks of (s, Y, H) over the hours covered by any clip; hours outside of
+        # clips or missing from the weather are flagged and do not accumulate. `batch` is the result of
+        # _season_batch() when the caller already has it
+        valid, J, chunks = self._accumulate_degrees_batch(years, coeffs, size, batch)
+        return valid, J, ((k, cumulative['D'], outside) for k, cumulative, outside in chunks)
+
+    def _accumulate_degrees_batch(self, years, coeffs, size, batch=None):
+        # same as _accumulate_batch() with every kind of degrees from _season_degrees()
+        if batch is None:
+            batch = self._season_batch(years, coeffs, size)
+        season, rows, h0, h1, valid = batch
+        if not valid.any():
+            return valid, None, iter(())
+
+        a, b = h0[valid].min(), h1[valid.any(axis=0)].max() + 1
+        J = season.julian[rows, a:b]
+        h = np.arange(a, b)
+        n = max(1, BATCH_SIZE // max(J.size, 1))
+        featured = self._featured
+
+        def chunks():
+            for s in range(0, size, n):
+                k = slice(s, min(s+n, size))
+                outside = (h < h0[k, :, None]) | (h > h1[None, :, None])
+                kcoeffs = {c: np.asarray(v)[k] for c, v in coeffs.items()}
+                degrees = self._season_degrees(season, rows, a, b, kcoeffs, skip=featured)
+                if featured:
+                    outside |= np.isnan(season.tavg[rows, a:b])
+                for units in degrees.values():
+                    outside |= np.isnan(units)
+                for units in degrees.values():
+                    units[outside] = 0.
+                    if season.step != 1:
+                        units *= season.step
+                cumulative = self._cumulate(degrees, kcoeffs)
+                for name in featured:
+                    cumulative[name] = self._feature_batch(season, rows, a, b, h0[k], name, kcoeffs)
+                yield k, cumulative, outside
+        return valid, J, chunks()
+
+    def _crossing(self, cumulative, outside, coeffs):
+        # hour (s, Y) of the first crossing of the requirement counted from the first hour of the chunk,
+        # kernel.NOT_MATCHED if never reached
+        if self._requirement is None:
+            raise NotImplementedError
+        R = np.asarray(coeffs[self._requirement], dtype=float)
+        return kernel.crossing(cumulative['D'], R[:, None], outside, continuous=self.continuous)
+
+    def _estimates_batch(self, years, coeffs):
+        # julian estimates in (S, Y) with their status; NaN unless STATUS_OK
+        size = len(next(iter(coeffs.values())))
+        valid, J, chunks = self._accumulate_degrees_batch(years, coeffs, size)
+        est = np.full(valid.shape, np.nan)
+        y = np.arange(valid.shape[1])
+        for k, cumulative, outside in chunks:
+            i = self._crossing(cumulative, outside, {c: np.asarray(v)[k] for c, v in coeffs.items()})
+            j = kernel.interpolate(J, np.clip(i, 0, None)) if self.continuous else J[y, np.clip(i, 0, None)]
+            est[k] = np.where(i != kernel.NOT_MATCHED, j, np.nan)
+        status = np.where(np.isnan(est), STATUS_NOT_REACHED, STATUS_OK)
+        status[self._invalid(coeffs)] = STATUS_INVALID_COEFF
+        status[~valid] = STATUS_NO_OBSERVATION
+        est[status != STATUS_OK] = np.nan
+        return est, status
+
+    def _curves_batch(self, years, coeffs, size):
+        # accumulation curves regardless of the requirement; yields a list of (cumulative, julian) over
+        # valid hours for every coefficient set, None for years whose weather cannot be clipped
+        valid, J, chunks = self._accumulate_batch(years, coeffs, size)
+        if J is None:
+            for s in range(size):
+                yield [None] * len(years)
+        invalid = self._invalid(coeffs)
+        never = (np.zeros(0), np.zeros(0))
+        for k, cumulative, outside in chunks:
+            for i, s in enumerate(range(k.start, k.stop)):
+                if invalid[s]:
+                    yield [never if valid[s, y] else None for y in range(len(years))]
+                    continue
+                yield [(cumulative[i, y][~outside[i, y]], J[y][~outside[i, y]]) if valid[s, y] else None for y in range(len(years))]
+
+    def _requirement_curves(self, years, coeffs, size):
+        # valid (S, Y), chunks of (k, cumulative, outside, julian) whose crossings of the requirement are the
+        # estimates, and whether crossings interpolate; julian broadcasts over the cumulative values
+        valid, J, chunks = self._accumulate_batch(years, coeffs, size)
+        return valid, ((k, cumulative, outside, J) for k, cumulative, outside in chunks), self.continuous
+
+    def _requirement_costs(self, X, years, coeff_names, fixed_coeff, R):
+        # rmse (S, K) of coefficient sets (S, N) lacking the requirement for each of its values R (K,), as
+        # _costs() gives them; the curve of every set is computed once and crossed by all the values
+        R = np.asarray(R, dtype=float)
+        coeffs = dict(zip(coeff_names, np.transpose(X)))
+        coeffs.update({k: np.full(len(X), v, dtype=float) for k, v in fixed_coeff.items()})
+        o = self._observed(years)
+        valid, chunks, continuous = self._requirement_curves(years, coeffs, len(X))
+        # years left out as masked by _residuals_batch()
+        used = valid & ~np.isnan(o)
+        sse = np.zeros((len(X), len(R)))
+        invalid = self._invalid(coeffs)
+        for k, cumulative, outside, J in chunks:
+            i = kernel.crossings(cumulative, R, outside, continuous=continuous)
+            # julian days (s, Y, K) at the (fractional) crossings, linear between entries
+            J = np.broadcast_to(J, cumulative.shape)
+            n = np.ceil(np.clip(i, 0, None)).astype(int)
+            current = np.take_along_axis(J, n, axis=-1)
+            j = current - (n - i) * (current - np.take_along_axis(J, np.clip(n - 1, 0, None), axis=-1))
+            reached = (i != kernel.NOT_MATCHED) & ~invalid[k, None, None]
+            e = np.where(reached, j - np.nan_to_num(o)[:, None], RESIDUAL_ESTIMATION_ERROR)
+            sse[k] = np.sum(np.where(used[k, :, None], e**2, 0.), axis=1)
+        n = used.sum(axis=1)[:, None]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return np.where(n > 0, np.sqrt(sse / n), np.inf)
+
+    def _profiles(self, X, years, coeff_names, fixed_coeff, profile):
+        # rmse and the optimal requirement of coefficient sets (S, N) lacking the profiled requirement
+        name, lower, upper = profile
+        coeffs = dict(zip(coeff_names, np.transpose(X)))
+        coeffs.update({k: np.full(len(X), v, dtype=float) for k, v in fixed_coeff.items()})
+        o = self._observed(years)
+        costs = np.full(len(X), np.inf)
+        R = np.full(len(X), float(lower))
+        for s, curves in enumerate(self._curves_batch(years, coeffs, len(X))):
+            used = [i for i, c in enumerate(curves) if c is not None and not np.isnan(o[i])]
+            if not used:
+                continue
+            sse, R[s] = kernel.profile([curves[i] for i in used], o[used], lower, upper, RESIDUAL_ESTIMATION_ERROR)
+            costs[s] = np.sqrt(sse / len(used))
+        return costs, R
+
+    def _costs(self, X, years, coeff_names, fixed_coeff, profile=None):
+        # rmse of a whole population of coefficient sets (S, N)
+        if profile is not None:
+            return self._profiles(X, years, coeff_names, fixed_coeff, profile)[0]
+        if not self._vectorized:
+            return np.array([self.metric(years, 'rmse', self._dictify(x, coeff_names, fixed_coeff)) for x in X])
+        coeffs = dict(zip(coeff_names, np.transpose(X)))
+        coeffs.update({k: np.full(len(X), v, dtype=float) for k, v in fixed_coeff.items()})
+        e = self._residuals_batch(years, coeffs)
+        return np.sqrt(np.ma.mean(e**2, axis=1)).filled(np.inf)
+
+    def _share(self, basename):
+        # lightweight copy for worker processes; weather is shared through memory-mapped season arrays
+        w = self.copy()
+        w._dataset = None
+        w._mets = w._cache_mets = None
+        w._cache = {k: v for k, v in self._cache.items() if k != 'memo' and not isinstance(v, Season)}
+        key = self._season_key(self._cache['season_offset'])
+        w._cache[key] = self._cache[key].share(basename)
+        return w
+
+    def _residuals_batch(self, years, coeffs):
+        # same as residuals() for every coefficient set, masked where residual() would be an observation error
+        o = self._observed(years)
+        p, status = self._estimates_batch(years, coeffs)
+        status[:, np.isnan(o)] = STATUS_NO_OBSERVATION
+        e = np.where(status == STATUS_OK, p - o, RESIDUAL_ESTIMATION_ERROR)
+        return np.ma.array(e, mask=status == STATUS_NO_OBSERVATION)
+
     # observation
     def observe(self, year, julian=False):
+        if julian:
+            o = self._observed([year])[0]
+            if np.isnan(o):
+                raise ObservationError("observation is not available for '{}'".format(year))
+            return o
         try:
             t = self._obss.loc[year].to_pydatetime().replace(hour=12)
         except:
             raise ObservationError("observation is not available for '{}'".format(year))
-        if julian:
-            return self._julian(t, year)
-        else:
-            return t
+        return t
 
     def observe_safely(self, year, julian=False):
         try:
@@ -240,11 +682,44 @@ class Estimator(object):
         except:
             return self._mask(julian)
 
+    def _observed(self, years):
+        # julian observations (at noon) with NaN where missing, as computed by _julian() for all years at once
+        def build():
+            t = pd.to_datetime(self._obss.dropna())
+            t = t[~t.index.duplicated(keep=False)]
+            return (t.dt.year - t.index)*365 + t.dt.dayofyear.astype(float) + 12/24.
+        obs = self._cached('observed', build)
+        return obs.reindex(years).values.astype(float)
+
     def observes(self, years, julian=False, skip_observation_check=False):
-        s = [self.observe_safely(y, julian) for y in self._years(years, skip_observation_check)]
+        years = self._years(years, skip_observation_check)
+        if julian:
+            s = np.nan_to_num(self._observed(years), nan=self._mask(julian))
+        else:
+            s = [self.observe_safely(y, julian) for y in years]
         return np.ma.masked_values(s, self._mask(julian))
 
     # calibration
+    @property
+    def _resolution(self):
+        # coefficients taking effect only in whole units (e.g. Ds as whole days by int())
+        return {'Ds': int}
+
+    def _precision(self, coeff_names, ranges):
+        # steps the other coefficients are rounded to when scored one at a time: a tenth of their grid step
+        # (0.01 C for temperatures on a 0.1 grid), well below what moves a crossing by an hour
+        return {k: g.step / 10. for k, g in zip(coeff_names, ranges) if isinstance(g, slice) and g.step}
+
+    def _quantize(self, x, coeff_names, precision={}):
+        r = self._resolution
+        def quantize(k, v):
+            if k in r:
+                return r[k](v)
+            if k in precision:
+                return float(np.round(np.round(v / precision[k]) * precision[k], 10))
+            return float(v)
+        return tuple(quantize(k, v) for k, v in zip(coeff_names, x))
+
     def _calibrate(self, years, disp=True, seed=1, **kwargs):
         opts = self.options(**kwargs)
 
@@ -260,6 +735,11 @@ class Estimator(object):
             coeff_names.remove(k)
             fixed_coeff_index.append(self.coeff_names.index(k))
 
+        # start from a known solution (i.e. of the full period for k-fold) instead of coeff0
+        warm_start = opts.get('warm_start', None)
+        if warm_start:
+            coeff0.update({k: v for k, v in warm_start.items() if k in coeff0})
+
         #HACK: remove Ds coeff if not used
         for k in self.coeff_names:
             if not k in coeff_names:
@@ -270,14 +750,36 @@ class Estimator(object):
         bounds = np.delete(opts['bounds'], fixed_coeff_index, axis=0)
         ranges = np.delete(opts['grid'], fixed_coeff_index, axis=0)
 
-        def cost(x, *args):
-            try:
-                coeff_names, fixed_coeff = args
-                coeff = self._dictify(x, coeff_names)
-                coeff.update(fixed_coeff)
-            except:
-                coeff = x
+        # solve the requirement exactly inside each evaluation instead of searching for it
+        profile = None
+        if opts.get('profile', False) and self._requirement in coeff_names:
+            if self.continuous:
+                # kernel.profile() solves for whole-hour crossings, not interpolated ones
+                raise ValueError("requirement '{}' cannot be profiled with continuous crossings".format(self._requirement))
+            i = coeff_names.index(self._requirement)
+            profile = (self._requirement,) + tuple(bounds[i])
+            coeff_names.pop(i)
+            x0 = np.delete(x0, i)
+            bounds = np.delete(bounds, i, axis=0)
+            ranges = np.delete(ranges, i, axis=0)
+
+        def score(key):
+            x = np.array(key, dtype=float)
+            if profile is not None:
+                return self._costs(np.array([x]), years, coeff_names, fixed_coeff, profile)[0]
+            coeff = self._dictify(x, coeff_names)
+            coeff.update(fixed_coeff)
             return self.metric(years, 'rmse', coeff)
+        memo = functools.lru_cache(maxsize=opts.get('cache_size', 2**16))(score)
+        precision = self._precision(coeff_names, ranges)
+
+        def cost(x, *args):
+            # revisited coefficients, or ones differing below their resolution or precision, are scored only once
+            return memo(self._quantize(x, coeff_names, precision))
+
+        def costs(X):
+            # score a whole population of coefficient sets at once
+            return self._costs(X, years, coeff_names, fixed_coeff, profile)
 
         # new default to 'differential evolution'
         if 'method' not in opts:
@@ -307,27 +809,166 @@ class Estimator(object):
                 },
                 disp=disp,
             ).x
+        elif 'l-bfgs-b'.startswith(opts['method']):
+            # batched central differences; coefficients taking effect in whole units step by one
+            r = self._resolution
+            steps = np.array([1. if k in r else opts.get('gradient_step', 1e-3) * (u - l) for k, (l, u) in zip(coeff_names, bounds)])
+            func = costs if self._vectorized or profile is not None else (lambda X: np.array([cost(x) for x in X]))
+            res = scipy.optimize.minimize(
+                fun=lambda x: optimize.gradient(func, x, bounds, steps),
+                x0=np.clip(x0, bounds[:, 0], bounds[:, 1]),
+                jac=True,
+                method='L-BFGS-B',
+                bounds=bounds,
+            ).x
         elif 'evolution'.startswith(opts['method']):
-            res = scipy.optimize.differential_evolution(
-                func=cost,
+            workers = opts.get('workers', 1)
+            # generations, population size (per coefficient) and final polish by L-BFGS-B as in scipy
+            settings = {'maxiter': opts.get('maxiter', 1000), 'popsize': opts.get('popsize', 15), 'polish': opts.get('polish', True)}
+            # state saved periodically to resume an interrupted calibration from, stopping once the best
+            # rmse stays within an hour (in days) for `patience` generations, and a log of every generation
+            control = {
+                'checkpoint': opts.get('checkpoint', None),
+                'checkpoint_interval': opts.get('checkpoint_interval', 60.),
+                'patience': opts.get('patience', None),
+                'min_improvement': opts.get('min_improvement', 1/24.),
+                'callback': optimize.Telemetry(opts['log']) if opts.get('log', None) else None,
+            }
+            if warm_start:
+                # population around the warm start, spread by a fraction of the bounds
+                control.update(x0=x0, spread=opts.get('warm_spread', 0.1))
+            control.update(settings)
+            batched = (self._vectorized and opts.get('vectorized', True)) or profile is not None
+            if workers > 1:
+                # batches of the population scored across processes by the same evolution in-house
+                with self._pool(workers, years, coeff_names, fixed_coeff, profile, bounds) as p:
+                    res = optimize.evolution(
+                        func=lambda X: _evaluate_pool(p, X, workers),
+                        bounds=bounds,
+                        seed=seed,
+                        disp=disp,
+                        **control
+                    ).x
+            elif any(v is not None for k, v in control.items() if k in ('checkpoint', 'patience', 'callback', 'x0')):
+                # scipy has no checkpoints, stagnation, log or warm start; opt in to the same evolution in-house
+                res = optimize.evolution(
+                    func=costs if batched else (lambda X: np.array([cost(x) for x in X])),
+                    bounds=bounds,
+                    seed=seed,
+                    disp=disp,
+                    **control
+                ).x
+            elif batched:
+                # scipy passes the population as (N, S), and single points (N,) when polishing
+                res = scipy.optimize.differential_evolution(
+                    func=lambda X: costs(np.transpose(X)) if np.ndim(X) == 2 else costs(np.array([X]))[0],
+                    bounds=bounds,
+                    seed=seed,
+                    disp=disp,
+                    vectorized=True,
+                    updating='deferred',
+                    **settings
+                ).x
+            else:
+                res = scipy.optimize.differential_evolution(
+                    func=cost,
+                    bounds=bounds,
+                    args=args,
+                    seed=seed,
+                    disp=disp,
+                    **settings
+                ).x
+        elif 'multistart'.startswith(opts['method']):
+            workers = opts.get('workers', 1)
+            kwargs = dict(
+                bounds=bounds,
+                seed=seed,
+                starts=opts.get('starts', None),
+                disp=disp,
+            )
+            if workers > 1:
+                with self._pool(workers, years, coeff_names, fixed_coeff, profile, bounds) as p:
+                    res = optimize.multistart(func=None, map=lambda tasks: p.map(_search_worker, tasks, chunksize=1), **kwargs)
+            else:
+                res = optimize.multistart(func=lambda x: costs(np.array([x]))[0], **kwargs)
+            self.basins = pd.DataFrame([dict(self._dictify(b['x'], coeff_names), rmse=b['fun'], starts=b['starts']) for b in res.basins])
+            if disp:
+                print('{} - {} - calibrate.multistart: {} starts, {} cancelled, {} evaluations, {} basins'.format(datetime.datetime.now(), self.name, res.starts, res.cancelled, res.nfev, len(res.basins)))
+                print(self.basins)
+            res = res.x
+        elif 'surrogate'.startswith(opts['method']):
+            res = optimize.surrogate(
+                func=costs if self._vectorized or profile is not None else (lambda X: np.array([cost(x) for x in X])),
                 bounds=bounds,
-                args=args,
                 seed=seed,
+                budget=opts.get('budget', None),
                 disp=disp,
             ).x
         elif 'brute'.startswith(opts['method']):
-            res = scipy.optimize.brute(
-                func=cost,
+            inner, subgrid = [], None
+            if self._vectorized or profile is not None:
+                func = costs
+                if profile is None and self._requirement in coeff_names:
+                    # every grid value of the requirement read off the same curves
+                    i = coeff_names.index(self._requirement)
+                    R = np.mgrid[ranges[i]]
+                    outer = coeff_names[:i] + coeff_names[i+1:]
+                    inner = [i]
+                    subgrid = lambda X: self._requirement_costs(X, years, outer, fixed_coeff, R)
+            else:
+                func = lambda X: np.array([cost(x) for x in X])
+            res = optimize.grid(
+                func=func,
                 ranges=ranges,
-                args=args,
-                full_output=True,
-                finish=scipy.optimize.fmin,
-                disp=disp,
-            )[0]
+                inner=inner,
+                subgrid=subgrid,
+                chunksize=opts.get('chunk_size', 4096),
+            )
+            if disp:
+                print('{} - {} - calibrate.grid: {} evaluated, f(x)= {:g}'.format(datetime.datetime.now(), self.name, res.nfev, res.fun))
+            if opts.get('finish', True):
+                # refine locally from the best grid point within bounds
+                fin = scipy.optimize.minimize(
+                    fun=cost,
+                    x0=res.x,
+                    args=args,
+                    method='Nelder-Mead',
+                    bounds=bounds,
+                )
+                res = fin if fin.fun < res.fun else res
+            res = res.x
         else:
             raise NameError("method '{}' is not defined".format(opts['method']))
+        info = memo.cache_info()
+        if info.hits + info.misses > 0:
+            # coefficients as scored
+            res = np.array(self._quantize(res, coeff_names, precision))
+            if disp:
+                print('{} - {} - calibrate.cache: {}'.format(datetime.datetime.now(), self.name, info))
         coeff = self._dictify(res, coeff_names, fixed_coeff)
-        return coeff
+        if profile is not None:
+            X = np.array([self._listify(coeff, coeff_names)])
+            coeff[profile[0]] = self._profiles(X, years, coeff_names, fixed_coeff, profile)[1][0]
+            coeff = {k: coeff[k] for k in self.coeff_names if k in coeff}
+        # saved coefficients reproduce their estimates without the feature cache
+        return self._snapped(coeff)
+
+    @contextlib.contextmanager
+    def _pool(self, workers, years, coeff_names, fixed_coeff, profile, bounds):
+        # worker processes scoring coefficient sets on the season shared through memory-mapped files
+        # make sure the shared season covers every start date in bounds
+        self._years(None)
+        if 'Ds' in coeff_names:
+            self._season(int(np.floor(bounds[coeff_names.index('Ds')][0])))
+        else:
+            self._season()
+        tmp = tempfile.mkdtemp(prefix='pheno-')
+        worker = self._share(os.path.join(tmp, 'season'))
+        try:
+            with mp.Pool(workers, initializer=_initialize_worker, initargs=(worker, years, coeff_names, fixed_coeff, profile)) as p:
+                yield p
+        finally:
+            shutil.rmtree(tmp, ignore_errors=True)
 
     def calibrate(self, years=None, disp=True, save=True, **kwargs):
         years = self._years(years)
@@ -338,26 +979,94 @@ class Estimator(object):
             self._coeffs[''] = coeff
         return coeff
 
-    def calibrate_multi(self, years, splitter_name, save=True):
+    def calibrate_multi(self, years, splitter_name, save=True, checkpoint=None, log=None, warm_spread=0.1):
         years = self._years(years)
+        # folds differ from the full period by a few years; start them from its solution if calibrated
+        warm = {'warm_start': self._coeff, 'warm_spread': warm_spread} if self._coeff and warm_spread is not None else {}
         splitter = getattr(self, splitter_name)
         validate_years_list = splitter(years)
         calibrate_years_list = [sorted(set(years) - set(validate_years)) for validate_years in validate_years_list]
-        args_list = [([calibrate_years, False, False]) for calibrate_years in calibrate_years_list]
+
+        # a checkpoint and log of every fold numbered after the given filenames
+        def fold(i):
+            def number(filename):
+                base, ext = os.path.splitext(filename)
+                return '{}_{}{}'.format(base, i, ext)
+            kwargs = {k: number(v) for k, v in (('checkpoint', checkpoint), ('log', log)) if v is not None}
+            kwargs.update(warm)
+            return kwargs
+        args_list = [(self, calibrate_years, fold(i)) for i, calibrate_years in enumerate(calibrate_years_list)]
 
         with mp.Pool() as p:
-            coeff_list = p.starmap(self.calibrate, args_list)
+            coeff_list = p.starmap(_calibrate_worker, args_list)
         keys = [tuple(k) for k in calibrate_years_list]
         coeffs = dict(zip(keys, coeff_list))
         if save:
             self._coeffs = coeffs
         return coeffs
 
-    # preset from multi.py
-    def preset(self, years, single=True, multi=True, output=None):
-        if output is None:
-            output = path.output
+    def calibrate_posterior(self, years=None, steps=1000, walkers=None, burn=None, thin=1, spread=0.01, coeff=None, chain=None, disp=True, seed=1, **kwargs):
+        # draws from the posterior of coefficients with uniform priors within bounds and normal errors of
+        # unknown deviation, sampled by an ensemble of walkers started around the calibrated coefficients
+        years = self._years(years)
+        opts = self.options(**kwargs)
+        fixed_coeff = opts.get('fixed_coeff', {})
+        coeff_names = [k for k in self.actual_coeff_names if k not in fixed_coeff]
+        bounds = np.array([opts['bounds'][self.coeff_names.index(k)] for k in coeff_names], dtype=float)
+        if coeff is None:
+            coeff = self._coeff if self._coeff else self.calibrate(years, disp, save=False, **kwargs)
+        x0 = np.array(self._listify(coeff, coeff_names), dtype=float)
+        # with the deviation integrated out, log likelihood is -m log(rmse) up to a constant for m observations
+        m = np.count_nonzero(~np.isnan(self._observed(years)))
+        workers = opts.get('workers', 1)
+        if walkers is None:
+            walkers = 4 * len(coeff_names)
+        walkers += walkers % 2
+
+        def logp(X, costs):
+            inside = np.all((bounds[:, 0] <= X) & (X <= bounds[:, 1]), axis=1)
+            L = np.full(len(X), -np.inf)
+            if inside.any():
+                with np.errstate(divide='ignore'):
+                    L[inside] = -m * np.log(costs(X[inside]))
+            return L
+
+        def sample(costs):
+            # walkers spread around x0 by a fraction of the bounds, redrawing impossible ones
+            rng = np.random.RandomState(seed)
+            X = np.empty((walkers, len(x0)))
+            redraw = np.ones(walkers, dtype=bool)
+            for i in range(100):
+                X[redraw] = np.clip(x0 + spread * (bounds[:, 1] - bounds[:, 0]) * rng.normal(size=(redraw.sum(), len(x0))), bounds[:, 0], bounds[:, 1])
+                redraw[redraw] = np.isinf(logp(X[redraw], costs))
+                if not redraw.any():
+                    break
+            else:
+                raise EstimationError("walkers cannot be started around '{}'".format(coeff))
+            return optimize.ensemble(lambda X: logp(X, costs), X, steps=steps, seed=seed, chain=chain, disp=disp)
 
+        if workers > 1:
+            with self._pool(workers, years, coeff_names, fixed_coeff, None, bounds) as p:
+                res = sample(lambda X: _evaluate_pool(p, X, workers))
+        else:
+            res = sample(lambda X: self._costs(X, years, coeff_names, fixed_coeff))
+        if burn is None:
+            burn = steps // 2
+        draws = pd.DataFrame(res.chain[burn::thin, :, :-1].reshape(-1, len(coeff_names)).astype(float), columns=coeff_names)
+        for k, v in fixed_coeff.items():
+            draws[k] = v
+        for response, names in self._featured.values():
+            for k in names:
+                draws[k] = self._snap(k, draws[k].values)
+        draws['logp'] = res.chain[burn::thin, :, -1].reshape(-1).astype(float)
+        if disp:
+            print('{} - {} - calibrate.posterior: {} draws, acceptance {:.2f}, {} evaluations'.format(datetime.datetime.now(), self.name, len(draws), res.acceptance.mean(), res.nfev))
+            print(draws[coeff_names].describe(percentiles=[.05, .5, .95]).loc[['mean', 'std', '5%', '50%', '95%']])
+        self.posterior = draws
+        return draws
+
+    def _preset_key(self, years):
+        # stem of the files preset() stores results under
         key = slugname(
             self.name,
             self._dataset.met_station,
@@ -367,10 +1076,27 @@ class Estimator(object):
             self._dataset.stage,
             years,
         )
+        if self.resolution != 'hourly':
+            key = slugname(key, self.resolution)
+        if self.continuous:
+            key = slugname(key, 'continuous')
+        return key
+
+    # preset from multi.py
+    def preset(self, years, single=True, multi=True, output=None):
+        if output is None:
+            output = path.output
+        key = self._preset_key(years)
 
         def filename(var):
             return output.outfilename('coeffs', '{}_{}'.format(key, var), 'npy')
 
+        def checkpoint(var):
+            return output.outfilename('checkpoints', '{}_{}'.format(key, var), 'npz')
+
+        def log(var):
+            return output.outfilename('logs', '{}_{}'.format(key, var), 'csv')
+
         def load(var, callback):
             fn = filename(var)
             print('{} - {} - preset.load: {}'.format(datetime.datetime.now(), self.name, fn))
@@ -386,9 +1112,9 @@ class Estimator(object):
         self._calibrate_years = self._years(years)
 
         if single:
-            load('_coeff', lambda: self.calibrate(years))
+            load('_coeff', lambda: self.calibrate(years, checkpoint=checkpoint('_coeff'), log=log('_coeff')))
         if multi:
-            load('_coeffs', lambda: self.calibrate_multi(years, '_splitter_k_fold'))
+            load('_coeffs', lambda: self.calibrate_multi(years, '_splitter_k_fold', checkpoint=checkpoint('_coeffs'), log=log('_coeffs')))
 
     # validation
     def residual(self, year, coeff=None, func=None):
@@ -415,73 +1141,108 @@ class Estimator(object):
     def _is_higher_better(how):
         return how in {'ef', 'ef1', 'd', 'd1', 'dr', 'm', 'r'}
 
-    def metric(self, years, how='e', coeff=None, ignore_estimation_error=False):
-        years = self._years(years)
+    def _outcomes(self, years, coeff=None):
+        # observation and estimate of every year in a single pass, with the error code residual() gives
+        mask = self._mask(julian=True)
+        obs, est, errors = [], [], []
+        for y, o in zip(years, self._observed(years)):
+            if np.isnan(o):
+                o = mask
+                error = RESIDUAL_OBSERVATION_ERROR
+            else:
+                error = None
+            try:
+                p = self.estimate(y, coeff, julian=True)
+            except ObservationError:
+                p = mask
+                error = error or RESIDUAL_OBSERVATION_ERROR
+            except EstimationError:
+                p = mask
+                error = error or RESIDUAL_ESTIMATION_ERROR
+            obs.append(o)
+            est.append(p)
+            errors.append(error)
+        return obs, est, errors
 
-        how = how.lower()
-        if how == 'observe':
-            return self.residuals(years, coeff, ignore_estimation_error, func=lambda o, e: o)
-        elif how == 'estimate':
-            return self.residuals(years, coeff, ignore_estimation_error, func=lambda o, e: e)
+    def metric(self, years, how='e', coeff=None, ignore_estimation_error=False):
+        return self.metrics(years, [how], coeff, ignore_estimation_error)[how]
 
-        e = self.residuals(years, coeff, ignore_estimation_error)
+    def metrics(self, years, hows, coeff=None, ignore_estimation_error=False):
+        years = self._years(years)
+        obs, est, errors = self._outcomes(years, coeff)
 
-        if how == 'e':
+        def residuals(func):
+            e = np.ma.masked_values([func(o, p) if r is None else r for o, p, r in zip(obs, est, errors)], RESIDUAL_OBSERVATION_ERROR)
+            if ignore_estimation_error:
+                e = np.ma.masked_where(e == RESIDUAL_ESTIMATION_ERROR, e)
             return e
-        elif how == 'rmse':
-            return np.sqrt(np.mean(e**2))
-        elif how == 'me':
-            return np.mean(e)
-        elif how == 'mae':
-            return np.mean(np.abs(e))
-        elif how == 'xe':
-            try:
-                return np.nanmax(np.abs(e))
-            except:
-                return np.nan
-
-        o = self.observes(years, julian=True)
-        p = self.estimates(years, coeff, julian=True)
-        # use calibrate_years, not input years
-        #TODO how to replace self._calibrate_years with ModelSuite.calibrate_years?
-        #o_hat = self.observes(self._calibrate_years, julian=True).mean()
-        o_hat = o.mean()
-        d_est = p - o_hat
-        d_obs = o - o_hat
-
-        if how == 'ef':
-            # Nash-Sutcliffe's coefficient of efficiency (Nash et al., 1970)
-            return 1. - np.sum(e**2) / np.sum(d_obs**2)
-        elif how == 'ef1':
-            # Legates-McCabe's index (Legates et al., 1999)
-            return 1. - np.sum(np.abs(e)) / np.sum(np.abs(d_obs))
-        elif how == 'd':
-            # Willmott's index of agreement (Willmott et al., 1980)
-            return 1. - np.sum(e**2) / np.sum((np.abs(d_est) + np.abs(d_obs))**2)
-        elif how == 'd1':
-            # Willmott's another index of agreement (Willmott et al., 1985)
-            return 1. - np.sum(np.abs(e)) / np.sum(np.abs(d_est) + np.abs(d_obs))
-        elif how == 'dr':
-            # Willmott's refined index of agreement (Willmott et al., 2012)
-            c = 2
-            dru = np.sum(np.abs(e))
-            drl = c * np.sum(np.abs(d_obs))
-            if dru <= drl:
-                return 1. - dru / drl
-            else:
-                return drl / dru - 1.
-        elif how == 'm':
-            # Watterson's M (Watterson et al., 1996)
-            mse = np.mean(e**2)
-            p_hat = p.mean()
-            return 2. / np.pi * np.arcsin(1. - mse / (p.var() + o.var() + (p_hat - o_hat)**2))
-        elif how == 'r':
-            # Mielke-Berry's R (Mielke et al., 2001)
-            mae = np.mean(np.abs(e))
-            n = len(years)
-            pp = np.repeat(p, n)
-            oo = np.tile(o, n)
-            return 1. - mae / ((np.sum(np.abs(pp - oo))) / n**2)
+        e = residuals(lambda o, p: p - o)
+
+        def agreement():
+            o = np.ma.masked_values(obs, self._mask(julian=True))
+            p = np.ma.masked_values(est, self._mask(julian=True))
+            # use calibrate_years, not input years
+            #TODO how to replace self._calibrate_years with ModelSuite.calibrate_years?
+            #o_hat = self.observes(self._calibrate_years, julian=True).mean()
+            o_hat = o.mean()
+            d_est = p - o_hat
+            d_obs = o - o_hat
+            return o, p, o_hat, d_est, d_obs
+
+        def metric(how):
+            if how == 'observe':
+                return residuals(lambda o, p: o)
+            elif how == 'estimate':
+                return residuals(lambda o, p: p)
+            elif how == 'e':
+                return e
+            elif how == 'rmse':
+                return np.sqrt(np.mean(e**2))
+            elif how == 'me':
+                return np.mean(e)
+            elif how == 'mae':
+                return np.mean(np.abs(e))
+            elif how == 'xe':
+                try:
+                    return np.nanmax(np.abs(e))
+                except:
+                    return np.nan
+
+            o, p, o_hat, d_est, d_obs = agreement()
+            if how == 'ef':
+                # Nash-Sutcliffe's coefficient of efficiency (Nash et al., 1970)
+                return 1. - np.sum(e**2) / np.sum(d_obs**2)
+            elif how == 'ef1':
+                # Legates-McCabe's index (Legates et al., 1999)
+                return 1. - np.sum(np.abs(e)) / np.sum(np.abs(d_obs))
+            elif how == 'd':
+                # Willmott's index of agreement (Willmott et al., 1980)
+                return 1. - np.sum(e**2) / np.sum((np.abs(d_est) + np.abs(d_obs))**2)
+            elif how == 'd1':
+                # Willmott's another index of agreement (Willmott et al., 1985)
+                return 1. - np.sum(np.abs(e)) / np.sum(np.abs(d_est) + np.abs(d_obs))
+            elif how == 'dr':
+                # Willmott's refined index of agreement (Willmott et al., 2012)
+                c = 2
+                dru = np.sum(np.abs(e))
+                drl = c * np.sum(np.abs(d_obs))
+                if dru <= drl:
+                    return 1. - dru / drl
+                else:
+                    return drl / dru - 1.
+            elif how == 'm':
+                # Watterson's M (Watterson et al., 1996)
+                mse = np.mean(e**2)
+                p_hat = p.mean()
+                return 2. / np.pi * np.arcsin(1. - mse / (p.var() + o.var() + (p_hat - o_hat)**2))
+            elif how == 'r':
+                # Mielke-Berry's R (Mielke et al., 2001)
+                mae = np.mean(np.abs(e))
+                n = len(years)
+                pp = np.repeat(p, n)
+                oo = np.tile(o, n)
+                return 1. - mae / ((np.sum(np.abs(pp - oo))) / n**2)
+        return collections.OrderedDict((how, metric(how.lower())) for how in hows)
 
     def _splitter_leave_n_out(self, years, n=1):
         return [list(y) for y in itertools.combinations(years, n)]
@@ -499,18 +1260,46 @@ class Estimator(object):
             #splitter = lambda years: self._splitter_k_fold(years, k=5)
         validate_years_list = splitter(years)
 
-        def metric(validate_years):
+        def metrics(validate_years):
             calibrate_years = sorted(set(years) - set(validate_years))
             try:
                 coeff = self._coeffs[tuple(calibrate_years)]
             except:
                 coeff = self.calibrate(calibrate_years, save=False, **kwargs)
-            return self.metric(validate_years, how, coeff, ignore_estimation_error)
-        cv = np.ma.array([metric(v) for v in validate_years_list])
-        if cv.dtype == np.object:
-            cv = np.concatenate(cv)
-        cv.set_fill_value(np.nan)
-        return cv.flatten()
+            return self.metrics(validate_years, self._hows(how), coeff, ignore_estimation_error)
+        return self._crossvalidation(how, [metrics(v) for v in validate_years_list])
+
+    @staticmethod
+    def _hows(how):
+        return [how] if isinstance(how, str) else list(how)
+
+    @classmethod
+    def _crossvalidation(cls, how, folds):
+        # flatten metrics of each fold; a list of hows gives them all at once by name
+        def flatten(how):
+            cv = np.ma.array([f[how] for f in folds])
+            if cv.dtype == object:
+                cv = np.concatenate(cv)
+            cv.set_fill_value(np.nan)
+            return cv.flatten()
+        if isinstance(how, str):
+            return flatten(how)
+        return collections.OrderedDict((h, flatten(h)) for h in cls._hows(how))
+
+    def compare_resolution(self, years=None, coeff=None):
+        # julian estimates of the same coefficients at hourly and daily resolution, NaN where not estimated
+        years = self._years(years)
+        def estimates(resolution):
+            m = self.copy()
+            m.resolution = resolution
+            return m.estimates(years, coeff, julian=True).astype(float).filled(np.nan)
+        hourly = estimates('hourly')
+        daily = estimates('daily')
+        return pd.DataFrame({
+            'hourly': hourly,
+            'daily': daily,
+            'difference': daily - hourly,
+        }, index=pd.Index(years, name='year'))
 
     def analyze_sensitivity(self, years, deltas):
         years = self._years(years)
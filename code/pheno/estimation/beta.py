@@ -1,9 +1,9 @@
 from __future__ import division
 
 from .base import Estimator, EstimationError
+from .kernel import accumulate
 
 import numpy as np
-import pandas as pd
 
 class BetaFunc(Estimator):
     @property
@@ -27,24 +27,52 @@ class BetaFunc(Estimator):
             'grid': (slice(-100, 100, 1), slice(20, 60, 0.5), slice(0, 40, 0.5), slice(0, 200, 1)),
         }
 
+    @property
+    def _vectorized(self):
+        return True
+
+    @property
+    def _requirement(self):
+        return 'Rg'
+
+    def _rates(self, T, coeffs):
+        Tn, To, Tx = 0, coeffs['To'][:, None, None], coeffs['Tx'][:, None, None]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            Txu = Tx - T
+            Txl = Tx - To
+            Tnu = T - Tn
+            Tnl = To - Tn
+            c = (To - Tn) / (Tx - To)
+            p = np.power(Tnu/Tnl, c)
+            r = (Txu/Txl)*np.where(np.isnan(p), 0, p)
+        return np.clip(r, 0, None) / 24
+
+    def _invalid(self, coeffs):
+        # temperatures out of order never reach the requirement
+        Tn, To, Tx = 0, coeffs['To'], coeffs['Tx']
+        return ~((Tn < To) & (To < Tx))
+
+    @property
+    def _features(self):
+        return {'D': ('bf', ['Tx', 'To'])}
+
     def _estimate(self, year, met, coeff):
-        T = met.tavg
         Tn, To, Tx = 0, coeff['To'], coeff['Tx']
         if not Tn < To < Tx:
             raise EstimationError("temperature out of order: Tn='{}' < To='{}' < Tx='{}'".format(Tn, To, Tx))
+        c = self._feature(met, 'D', coeff)
+        if c is not None:
+            return self._match(c, coeff['Rg'])
 
-        Txu = Tx - T
-        Txl = Tx - To
-        Tnu = T - Tn
-        Tnl = To - Tn
-        c = (To - Tn) / (Tx - To)
-        r = (Txu/Txl)*(Tnu/Tnl).pow(c).fillna(0)
-        g = r.clip(lower=0) / 24
-
-        aux = pd.concat({
-            'r': r,
-            'g': g,
-            'Cg': g.cumsum(),
-        }, axis=1)
-
-        return self._match(aux['Cg'], coeff['Rg'])
+        def f(T):
+            Txu = Tx - T
+            Txl = Tx - To
+            Tnu = T - Tn
+            Tnl = To - Tn
+            c = (To - Tn) / (Tx - To)
+            with np.errstate(invalid='ignore'):
+                p = np.power(Tnu/Tnl, c)
+            r = (Txu/Txl)*np.where(np.isnan(p), 0, p)
+            return np.clip(r, 0, None) / 24
+        g = self._respond(met, f)
+        return self._match(accumulate(g), coeff['Rg'])
@@ -1,7 +1,7 @@
 from .base import Estimator, EstimationError
+from .kernel import accumulate, crossing
 
 import numpy as np
-import pandas as pd
 import datetime
 
 class ChillingForce(Estimator):
@@ -29,16 +29,43 @@ class ChillingForce(Estimator):
         # fix the start date as October 1st
         return datetime.date(year-1, 10, 1)
 
+    @property
+    def _vectorized(self):
+        return True
+
+    def _units(self, T, Tc):
+        return (np.clip(T, 0, None) - Tc) / 24.
+
     def _degrees(self, year, met, coeff):
-        T = met.tavg.clip(lower=0)
-        Tc = coeff['Tc']
-        units = (T - Tc) / 24.
+        units = self._respond(met, lambda T: self._units(T, coeff['Tc']))
 
         # daily chill / heat (anti-chill) units
-        return pd.concat({
-            'Dc': units.clip(upper=0),
-            'Dh': units.clip(lower=0),
-        }, axis=1)
+        return {
+            'Dc': np.clip(units, None, 0),
+            'Dh': np.clip(units, 0, None),
+        }
+
+    @property
+    def _features(self):
+        return {'Dh': ('cf', ['Tc'])}
+
+    def _feature_response(self, response, coeff):
+        return lambda T: np.clip(self._units(T, coeff['Tc']), 0, None)
+
+    def _season_degrees(self, season, rows, a, b, coeffs, skip=()):
+        Tc = coeffs['Tc'][:, None, None]
+        degrees = {
+            'Dc': lambda T: np.clip(self._units(T, Tc), None, 0),
+            'Dh': lambda T: np.clip(self._units(T, Tc), 0, None),
+        }
+        return {k: self._season_response(season, rows, a, b, f) for k, f in degrees.items() if k not in skip}
+
+    def _crossing(self, cumulative, outside, coeffs):
+        # chill runs down to Rc, then anti-chill makes up for it (-Rc) and heat accumulates Rd for flowering
+        Rc = coeffs['Rc'][:, None]
+        awakening = crossing(cumulative['Dc'], Rc, outside, descending=True)
+        budding = crossing(cumulative['Dh'], -Rc, outside, start=awakening)
+        return crossing(cumulative['Dh'], coeffs['Rd'][:, None], outside, start=budding, continuous=self.continuous)
 
     def _estimate(self, year, met, coeff):
         D = self._degrees(year, met, coeff)
@@ -48,11 +75,13 @@ class ChillingForce(Estimator):
         # rest & quiescence ends = dormancy release = bud burst
         Rc = coeff['Rc']
         try:
-            rest = chill.cumsum()
+            rest = accumulate(chill)
             #HACK _match() assumes pre-sorted ascending order
-            awakening = self._match(rest, Rc, descending=True)
-            quiescence = heat.loc[awakening:].cumsum()
-            budding = self._match(quiescence, -Rc)
+            awakening = self._match(rest, Rc, descending=True, continuous=False)
+            quiescence = self._feature(met, 'Dh', coeff)
+            if quiescence is None:
+                quiescence = accumulate(heat)
+            budding = self._match(quiescence, -Rc, start=awakening, continuous=False)
         except EstimationError as e:
             #HACK immature calibration with forced dormancy break
             # force dormancy release when spring comes
@@ -62,8 +91,7 @@ class ChillingForce(Estimator):
 
         # development after bud burst
         Rd = coeff['Rd']
-        development = heat.loc[budding:].cumsum()
-        flowering = self._match(development, Rd)
+        flowering = self._match(quiescence, Rd, start=budding)
         return flowering
 
 
@@ -72,47 +100,44 @@ class ChillingForceDay(ChillingForce):
     def name(self):
         return 'CFD'
 
+    @property
+    def _diurnal(self):
+        return 1
+
+    @property
+    def _features(self):
+        # daily units are not a response of hourly temperature
+        return {}
+
+    def _daily(self, x, n, M, Tc):
+        # daily chill (Cd) and anti-chill (Ca) by where Tc falls among tmin (n) and tmax (x)
+        cases = [
+            (0 <= Tc) & (Tc <= n) & (n <= x),
+            (0 <= n) & (n <= Tc) & (Tc < x),
+            (0 <= n) & (n <= x) & (x <= Tc),
+            (n < 0) & (0 <= x) & (x <= Tc),
+            (n < 0) & (0 < Tc) & (Tc <= x),
+        ]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            h = (x - Tc)**2 / (2*(x - n))
+            l = x**2 / (2*(x - n))
+            Cd = np.select(cases, [0, -((M - n) - h), -(M - n), -l, -l - h], 0)
+            Ca = np.select(cases, [M - Tc, h, 0, 0, h], 0)
+        return Cd, Ca
+
     def _degrees(self, year, met, coeff):
-        T = met.tavg.resample('D', how={
-            'x': np.max,
-            'n': np.min,
-            'M': np.mean,
-        })
-        Tc = coeff['Tc']
-
-        def chill(t):
-            Cd = 0
-            if 0 <= Tc <= t.n <= t.x:
-                Cd = 0
-            elif 0 <= t.n <= Tc < t.x:
-                Cd = -((t.M - t.n) - (t.x - Tc)**2 / (2*(t.x - t.n)))
-            elif 0 <= t.n <= t.x <= Tc:
-                Cd = -(t.M - t.n)
-            elif t.n < 0 <= t.x <= Tc:
-                Cd = -(t.x**2 / (2*(t.x - t.n)))
-            elif t.n < 0 < Tc <= t.x:
-                Cd = -(t.x**2 / (2*(t.x - t.n))) - (t.x - Tc)**2 / (2*(t.x - t.n))
-            return Cd
-
-        def anti_chill(t):
-            Ca = 0
-            if 0 <= Tc <= t.n <= t.x:
-                Ca = t.M - Tc
-            elif 0 <= t.n <= Tc < t.x:
-                Ca = (t.x - Tc)**2 / (2*(t.x - t.n))
-            elif 0 <= t.n <= t.x <= Tc:
-                Ca = 0
-            elif t.n < 0 <= t.x <= Tc:
-                Ca = 0
-            elif t.n < 0 < Tc <= t.x:
-                Ca = (t.x - Tc)**2 / (2*(t.x - t.n))
-            return Ca
-
-        def unit(f):
-            return T.apply(f, axis=1).resample('H', fill_method='ffill') / 24.
+        Cd, Ca = self._daily(met.daily('tmax'), met.daily('tmin'), met.daily('tmean'), coeff['Tc'])
 
         # daily chill / heat (anti-chill) units
-        return pd.concat({
-            'Dc': unit(chill),
-            'Dh': unit(anti_chill),
-        }, axis=1)
+        return {
+            'Dc': met.hourly(Cd) / 24. * met.step,
+            'Dh': met.hourly(Ca) / 24. * met.step,
+        }
+
+    def _season_degrees(self, season, rows, a, b, coeffs, skip=()):
+        Cd, Ca = self._daily(season.tmax[rows], season.tmin[rows], season.tmean[rows], coeffs['Tc'][:, None, None])
+        day = np.clip(season.day[rows, a:b], 0, None)[None, ...]
+        return {
+            'Dc': np.take_along_axis(Cd, day, axis=-1) / 24.,
+            'Dh': np.take_along_axis(Ca, day, axis=-1) / 24.,
+        }
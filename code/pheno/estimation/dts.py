@@ -1,7 +1,7 @@
 from .base import Estimator
+from .kernel import accumulate
 
 import numpy as np
-import pandas as pd
 
 class StandardTemperature(Estimator):
     @property
@@ -25,18 +25,48 @@ class StandardTemperature(Estimator):
             'grid': (slice(-100, 100, 1), slice(-10, 30, 1), slice(0, 200, 1), slice(0, 500, 1)),
         }
 
-    def _estimate(self, year, met, coeff):
-        Ea = coeff['Ea']
-        #T = met.tavg.resample('D') + 273.15
-        T = met.tavg.resample('H').mean() + 273.15
-        #Ts = 271.4 # standard temperature (K)
-        Ts = coeff['Ts'] + 273.15
+    @property
+    def _vectorized(self):
+        return True
+
+    @property
+    def _requirement(self):
+        return 'Rd'
+
+    def _response(self, K, Ts, Ea):
+        # exp(Ea*1000*(T-Ts)/(R*T*Ts)) rewritten as exp(Ea*1000/R*(1/Ts - 1/T)) on reciprocal Kelvin K and
+        # evaluated in place; Ts and Ea may be arrays broadcasting over K
         R = 8.314 # gas constant (J K-1 mol-1)
-        dts = np.exp(Ea * 1000. * (T - Ts) / (R * T * Ts))
-        #dts = dts.resample('H', fill_method='ffill')
-        dts = dts / 24.
-        aux = pd.concat({
-            'Dd': dts,
-            'Cd': dts.cumsum(),
-        }, axis=1)
-        return self._match(aux['Cd'], coeff['Rd'])
+        x = 1. / (Ts + 273.15) - K
+        x *= Ea * 1000. / R
+        np.exp(x, out=x)
+        x /= 24.
+        return x
+
+    def _kelvin(self, season):
+        # reciprocal Kelvin aligned with the season (or its distinct temperatures with lookup), computed once
+        lookup = self._lookup and season.quantized
+        return self._memo(('kelvin', id(season), lookup), lambda: 1. / ((season.levels if lookup else season.tavg) + 273.15))
+
+    def _rates(self, T, coeffs):
+        return self._response(1. / (T + 273.15), coeffs['Ts'][:, None, None], coeffs['Ea'][:, None, None])
+
+    def _season_rates(self, season, rows, a, b, coeffs):
+        Ts = coeffs['Ts'][:, None, None]
+        Ea = coeffs['Ea'][:, None, None]
+        K = self._kelvin(season)
+        if self._lookup and season.quantized:
+            r = self._response(K[None, :], Ts, Ea)
+            return np.take(r[:, 0], season.inverse[rows, a:b], axis=1)
+        return self._response(K[rows, a:b], Ts, Ea)
+
+    @property
+    def _features(self):
+        return {'D': ('dts', ['Ts', 'Ea'])}
+
+    def _estimate(self, year, met, coeff):
+        # season weather is already on a regular hourly grid
+        c = self._feature(met, 'D', coeff)
+        if c is None:
+            c = accumulate(self._respond(met, lambda T: self._response(1. / (T + 273.15), coeff['Ts'], coeff['Ea'])))
+        return self._match(c, coeff['Rd'])
@@ -77,6 +77,13 @@ class Ensemble(Estimator):
             self._coeffs[key] = coeff
             return coeff
 
+    def _timestamp(self, met, t):
+        # already estimated as a timestamp, not an hour offset
+        return t
+
+    def _julian_at(self, met, t, year):
+        return self._julian(t.to_pydatetime(), year)
+
     def _estimate(self, year, met, coeff):
         o = datetime.datetime(year, 1, 1)
         d = [m.estimate_safely(year, c, julian=True) for (m, c) in zip(self.estimators, coeff['C'])]
@@ -109,13 +116,10 @@ class Ensemble(Estimator):
             splitter = self._splitter_k_fold
         validate_years_list = splitter(years)
         calibrate_years_list = [sorted(set(years) - set(y)) for y in validate_years_list]
-        cv = np.ma.array([
-            self.metric_with_calibration(c, v, how) for c, v in zip(calibrate_years_list, validate_years_list)
-        ])
-        if cv.dtype == np.object:
-            cv = np.concatenate(cv)
-        cv.set_fill_value(np.nan)
-        return cv.flatten()
+        folds = [
+            self.metrics(v, self._hows(how), self._calibrated_coeff(c)) for c, v in zip(calibrate_years_list, validate_years_list)
+        ]
+        return self._crossvalidation(how, folds)
 
     def _update_mets_delta(self, delta):
         self._mets = self._dataset.weather() + delta
@@ -0,0 +1,64 @@
+import numpy as np
+import collections
+import os
+
+# number of curves kept open by each cache
+OPEN_SIZE = 64
+
+class FeatureCache(object):
+    """Cumulative responses of seasons persisted as memory-mapped arrays.
+
+    A curve is computed once for each season (identified by its weather and layout), response and
+    parameter values, and saved as a .npy file under `path`; estimators of any suite or process using
+    the same weather station then load it instead of evaluating the response again. A curve takes 8 bytes
+    for every hour of the season and calibration eventually visits every combination of grid values of
+    the response coefficients; those of BetaFunc (80 x 80) and StandardTemperature (40 x 200) reach
+    several GB per station, so ModelSuite can limit the cache to some estimators.
+    """
+    def __init__(self, path):
+        self.path = path
+        self._curves = collections.OrderedDict()
+
+    def __getstate__(self):
+        # worker processes reopen curves instead of unpickling them
+        state = self.__dict__.copy()
+        state['_curves'] = collections.OrderedDict()
+        return state
+
+    def _filename(self, season, response, params):
+        key = '_'.join([season.fingerprint, response] + [repr(float(p)) for p in params])
+        return os.path.join(self.path, '{}.npy'.format(key))
+
+    def _build(self, season, f):
+        # response of every hour (step) zero-filled where missing, then accumulated along each row
+        if season.quantized:
+            r = f(season.levels)[season.inverse]
+        else:
+            r = f(season.tavg)
+        r = np.where(np.isnan(r), 0., r)
+        if season.step != 1:
+            r *= season.step
+        return np.cumsum(r, axis=-1)
+
+    def _save(self, filename, curve):
+        # written aside and renamed so that concurrent runs never load a partial file
+        os.makedirs(self.path, exist_ok=True)
+        tmp = '{}.{}.tmp'.format(filename, os.getpid())
+        with open(tmp, 'wb') as f:
+            np.save(f, curve)
+        os.replace(tmp, filename)
+
+    def curve(self, season, response, params, f):
+        # cumulative response f(T) over every season row for the parameter values of the response
+        filename = self._filename(season, response, params)
+        try:
+            self._curves.move_to_end(filename)
+            return self._curves[filename]
+        except KeyError:
+            pass
+        if not os.path.exists(filename):
+            self._save(filename, self._build(season, f))
+        curve = self._curves[filename] = np.load(filename, mmap_mode='r')
+        if len(self._curves) > OPEN_SIZE:
+            self._curves.popitem(last=False)
+        return curve
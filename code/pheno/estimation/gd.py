@@ -1,4 +1,5 @@
 from .base import Estimator
+from .kernel import accumulate
 
 import datetime
 import numpy as np
@@ -26,18 +27,32 @@ class GrowingDegree(Estimator):
             'grid': (slice(-100, 100, 1), slice(0, 10, 0.1), slice(0, 1000, 1)),
         }
 
+    @property
+    def _vectorized(self):
+        return True
+
+    @property
+    def _requirement(self):
+        return 'Rd'
+
+    def _rates(self, T, coeffs):
+        Tb = coeffs['Tb'][:, None, None]
+        return np.clip(T - Tb, 0, None) / 24.
+
+    @property
+    def _features(self):
+        return {'D': ('gd', ['Tb'])}
+
     def _calculate(self, year, met, coeff):
         tbase = coeff['Tb']
-        tdd = (met.tavg - tbase).clip(lower=0) / 24.
+        tdd = self._respond(met, lambda T: np.clip(T - tbase, 0, None) / 24.)
         return tdd
 
     def _estimate(self, year, met, coeff):
-        tdd = self._calculate(year, met, coeff)
-        aux = pd.concat({
-            'Dd': tdd,
-            'Cd': tdd.cumsum(),
-        }, axis=1)
-        return self._match(aux['Cd'], coeff['Rd'])
+        c = self._feature(met, 'D', coeff)
+        if c is None:
+            c = accumulate(self._calculate(year, met, coeff))
+        return self._match(c, coeff['Rd'])
 
     def _preset_func(self, x):
         df, year, Dss, Tbs, Rd_max = x
@@ -93,9 +108,23 @@ class GrowingDegreeDay(GrowingDegree):
     def name(self):
         return 'GDD'
 
+    @property
+    def _diurnal(self):
+        return 1
+
+    @property
+    def _features(self):
+        # daily rates are not a response of hourly temperature
+        return {}
+
+    def _daily(self, tmax, tmin, Tb):
+        return np.clip((tmax + tmin) / 2. - Tb, 0, None)
+
+    def _season_rates(self, season, rows, a, b, coeffs):
+        tdd = self._daily(season.tmax[rows], season.tmin[rows], coeffs['Tb'][:, None, None])
+        day = np.clip(season.day[rows, a:b], 0, None)[None, ...]
+        return np.take_along_axis(tdd, day, axis=-1) / 24.
+
     def _calculate(self, year, met, coeff):
-        T = met.tavg.resample('D', how={'tmax': np.max, 'tmin': np.min})
-        tbase = coeff['Tb']
-        tdd = ((T.tmax + T.tmin) / 2. - tbase).clip(lower=0)
-        tdd = tdd.resample('H', fill_method='ffill') / 24.
-        return tdd
+        tdd = self._daily(met.daily('tmax'), met.daily('tmin'), coeff['Tb'])
+        return met.hourly(tdd) / 24. * met.step
@@ -0,0 +1,127 @@
+import numpy as np
+
+NOT_MATCHED = -1
+
+def accumulate(units):
+    # cumulative sum skipping missing hours, which stay NaN as in pandas
+    units = np.asarray(units, dtype=float)
+    invalid = np.isnan(units)
+    if not invalid.any():
+        return np.cumsum(units)
+    c = np.cumsum(np.where(invalid, 0., units))
+    c[invalid] = np.nan
+    return c
+
+def _fraction(previous, current, value):
+    # share of the step from the previous value to the current one needed to reach the value
+    with np.errstate(divide='ignore', invalid='ignore'):
+        f = (value - previous) / (current - previous)
+    return np.clip(np.nan_to_num(f, nan=1.), 0., 1.)
+
+def match(cumulative, value, descending=False, start=0, continuous=False):
+    # hour offset of the first valid entry reaching the value, also where cumulative values are not
+    # monotonic (i.e. daily chill turning positive); from a start offset, the value is reached by the
+    # increase over the last valid entry before it; continuous offsets interpolate linearly from the last
+    # valid entry before the one reaching the value, unless there is none
+    c = whole = np.asarray(cumulative, dtype=float)
+    if start:
+        before = c[:start][~np.isnan(c[:start])]
+        c = c[start:] - (before[-1] if len(before) else 0.)
+    if descending:
+        c = -c
+        value = -value
+    reached = c >= value
+    if len(c) == 0 or not reached.any():
+        return NOT_MATCHED
+    i = int(reached.argmax())
+    if not continuous or np.isnan(whole[:start + i]).all():
+        return start + i
+    before = c[:i][~np.isnan(c[:i])]
+    return start + i - 1 + float(_fraction(before[-1] if len(before) else 0., c[i], value))
+
+def crossing(cumulative, value, outside, start=None, descending=False, continuous=False):
+    # match() along the last axis of cumulative values with missing entries flagged outside (and zero-filled
+    # rates, so that the entry before the start holds the last valid value); value and start broadcast over
+    # the leading axes and an unmatched start stays unmatched
+    c = cumulative
+    reached = ~outside
+    if start is not None:
+        i = np.clip(start, 1, None)[..., None] - 1
+        c = c - np.where(start[..., None] > 0, np.take_along_axis(c, i, axis=-1), 0.)
+        reached = reached & (np.arange(c.shape[-1]) >= start[..., None])
+        reached &= start[..., None] != NOT_MATCHED
+    value = np.asarray(value)[..., None]
+    reached = reached & ((c <= value) if descending else (c >= value))
+    i = reached.argmax(axis=-1)
+    found = np.take_along_axis(reached, i[..., None], axis=-1)[..., 0]
+    if not continuous:
+        return np.where(found, i, NOT_MATCHED)
+    previous = np.take_along_axis(c, np.clip(i - 1, 0, None)[..., None], axis=-1)[..., 0]
+    current = np.take_along_axis(c, i[..., None], axis=-1)[..., 0]
+    first = (~outside).argmax(axis=-1)
+    f = np.where(i > first, _fraction(previous, current, value[..., 0]), 1.)
+    return np.where(found, i - 1 + f, NOT_MATCHED)
+
+def crossings(cumulative, values, outside, continuous=False):
+    # crossing() of every one of the values (K,) at once, as (..., K): the running maximum of valid entries
+    # first reaches a value where the first valid entry does, so the crossings of a row are where the
+    # values sort into its running maximum
+    c = np.asarray(cumulative, dtype=float)
+    values = np.asarray(values, dtype=float)
+    W = c.shape[-1]
+    m = np.maximum.accumulate(np.where(outside, -np.inf, c), axis=-1).reshape(-1, W)
+    i = np.array([np.searchsorted(row, values) for row in m], dtype=int).reshape(c.shape[:-1] + values.shape)
+    found = i < W
+    i = np.where(found, i, 0)
+    if not continuous:
+        return np.where(found, i, NOT_MATCHED)
+    previous = np.take_along_axis(c, np.clip(i - 1, 0, None), axis=-1)
+    current = np.take_along_axis(c, i, axis=-1)
+    first = (~np.asarray(outside)).argmax(axis=-1)[..., None]
+    f = np.where(i > first, _fraction(previous, current, values), 1.)
+    return np.where(found, i - 1 + f, NOT_MATCHED)
+
+def interpolate(J, i):
+    # values of J (Y, W) at (fractional) offsets i (..., Y) along the last axis, linear between entries
+    y = np.arange(J.shape[0])
+    k = np.clip(np.ceil(i).astype(int), 0, J.shape[-1] - 1)
+    current = J[y, k]
+    return current - (k - i) * (current - J[y, np.clip(k - 1, 0, None)])
+
+def profile(curves, observations, lower, upper, unreached):
+    # requirement within bounds minimizing the squared error of threshold crossings against observations;
+    # curves are (cumulative, julian) pairs of valid hours with non-decreasing cumulative values
+    curves = [(np.asarray(c, dtype=float), np.asarray(j, dtype=float)) for c, j in curves]
+    observations = np.asarray(observations, dtype=float)
+
+    # squared error of each year only decreases up to the last value crossed before the observation and
+    # only increases beyond it, so the optimum lies between the extremes of those values and the next ones
+    a, b = np.inf, -np.inf
+    for (c, j), o in zip(curves, observations):
+        if len(c) == 0:
+            continue
+        i = np.searchsorted(j, o)
+        if i == 0:
+            a = min(a, lower)
+            b = max(b, c[0])
+            continue
+        k = np.searchsorted(c, c[i-1], side='right')
+        a = min(a, c[i-1])
+        b = max(b, c[k] if k < len(c) else c[i-1])
+    a = np.clip(a, lower, upper) if np.isfinite(a) else lower
+    b = np.clip(b, lower, upper) if np.isfinite(b) else lower
+
+    # candidates are curve values (right edges of intervals sharing the same crossings) and b closing the
+    # last interval, which may have been clipped below the next curve value
+    R = np.unique(np.concatenate([[a, b]] + [c[(a < c) & (c <= b)] for c, j in curves]))
+    sse = np.zeros(len(R))
+    for (c, j), o in zip(curves, observations):
+        if len(c) == 0:
+            sse += unreached**2
+            continue
+        i = np.searchsorted(c, R)
+        e = np.where(i < len(c), j[np.minimum(i, len(c) - 1)] - o, unreached)
+        sse += e**2
+    k = np.argmin(sse)
+    # any value in (R[k-1], R[k]] gives the same crossings; take the middle to stay clear of rounding
+    return sse[k], (R[k] if k == 0 else (R[k-1] + R[k]) / 2.)
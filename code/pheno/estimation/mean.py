@@ -25,6 +25,13 @@ class Mean(Estimator):
         coeff = self._dictify([o])
         return coeff
 
+    def _timestamp(self, met, t):
+        # already estimated as a timestamp, not an hour offset
+        return t
+
+    def _julian_at(self, met, t, year):
+        return self._julian(t.to_pydatetime(), year)
+
     def _estimate(self, year, met, coeff):
         t = datetime.datetime(year, 1, 1) + datetime.timedelta(days=coeff['Do'])
         return pd.Timestamp(t)
@@ -0,0 +1,685 @@
+import numpy as np
+import os
+import time
+import scipy.optimize
+import scipy.linalg
+import scipy.stats
+
+class DifferentialEvolution(object):
+    """Differential evolution (best1bin) scoring the whole population in a single call.
+
+    Follows scipy.optimize.differential_evolution with deferred updating, but `func` receives an
+    (S, N) matrix of candidates and returns S costs so that estimators can evaluate them as arrays.
+    With `checkpoint`, the state is saved to that file every `checkpoint_interval` seconds and a later
+    solve of the same problem resumes from it; the file is removed once solved. With `patience`, the
+    solve also stops after that many generations without the best cost improving by `min_improvement`.
+    `callback` is called with the solver after every generation. With `x0`, the initial population is
+    spread around it by normal deviates of `spread` (as a fraction of the bounds) instead of sampled over
+    the whole bounds. With `polish`, the best member is refined by L-BFGS-B at the end as scipy does.
+    """
+    def __init__(self, func, bounds, seed=None, popsize=15, maxiter=1000,
+                 mutation=(0.5, 1), recombination=0.7, tol=0.01, atol=0, disp=False,
+                 checkpoint=None, checkpoint_interval=60., patience=None, min_improvement=0., callback=None,
+                 x0=None, spread=0.1, polish=False):
+        self.func = func
+        bounds = np.asarray(bounds, dtype=float)
+        self.lower, self.upper = bounds[:, 0], bounds[:, 1]
+        self.n = len(bounds)
+        self.size = max(5, popsize * self.n)
+        self.maxiter = maxiter
+        self.mutation = mutation
+        self.recombination = recombination
+        self.tol = tol
+        self.atol = atol
+        self.disp = disp
+        self.rng = np.random.RandomState(seed)
+        self.nit = 0
+        self.nfev = 0
+        self.checkpoint = checkpoint
+        self.checkpoint_interval = checkpoint_interval
+        self._saved = time.time()
+        # whether the state was loaded from the checkpoint, and seconds spent solving before this run
+        self.resumed = False
+        self.elapsed = 0.
+        self._started = time.time()
+        self.patience = patience
+        self.min_improvement = min_improvement
+        self.callback = callback
+        self.x0 = x0
+        self.spread = spread
+        self.polish = polish
+        # best cost at the last improvement and generations since
+        self.record = np.inf
+        self.stall = 0
+        # evaluations per second of the last generation
+        self.rate = np.nan
+
+    def _scale(self, population):
+        return self.lower + population * (self.upper - self.lower)
+
+    def runtime(self):
+        # seconds spent solving, including runs resumed from
+        return self.elapsed + time.time() - self._started
+
+    def _evaluate(self, population):
+        self.nfev += len(population)
+        t = time.time()
+        energies = np.asarray(self.func(self._scale(population)), dtype=float)
+        self.rate = len(population) / max(time.time() - t, 1e-9)
+        return energies
+
+    def save(self):
+        # written aside and renamed so that an interruption never leaves a partial checkpoint
+        _, keys, pos, has_gauss, cached_gaussian = self.rng.get_state()
+        tmp = '{}.{}.tmp'.format(self.checkpoint, os.getpid())
+        with open(tmp, 'wb') as f:
+            np.savez(f,
+                lower=self.lower, upper=self.upper,
+                population=self.population, energies=self.energies,
+                nit=self.nit, nfev=self.nfev, record=self.record, stall=self.stall, elapsed=self.runtime(),
+                keys=keys, pos=pos, has_gauss=has_gauss, cached_gaussian=cached_gaussian,
+            )
+        os.replace(tmp, self.checkpoint)
+        self._saved = time.time()
+
+    def load(self):
+        # state of an interrupted solve of the same problem, if saved
+        try:
+            with np.load(self.checkpoint) as s:
+                if not (np.array_equal(s['lower'], self.lower) and np.array_equal(s['upper'], self.upper) and s['population'].shape == (self.size, self.n)):
+                    return False
+                self.population = s['population'].copy()
+                self.energies = s['energies'].copy()
+                self.nit = int(s['nit'])
+                self.nfev = int(s['nfev'])
+                self.record = float(s['record'])
+                self.stall = int(s['stall'])
+                self.elapsed = float(s['elapsed']) if 'elapsed' in s.files else 0.
+                self.rng.set_state(('MT19937', s['keys'], int(s['pos']), int(s['has_gauss']), float(s['cached_gaussian'])))
+        except (OSError, KeyError, ValueError):
+            return False
+        return True
+
+    def _checkpoint(self):
+        if self.checkpoint is not None and time.time() - self._saved >= self.checkpoint_interval:
+            self.save()
+
+    def _promote(self):
+        # keep the best member at the front
+        i = np.argmin(self.energies)
+        self.population[[0, i]] = self.population[[i, 0]]
+        self.energies[[0, i]] = self.energies[[i, 0]]
+
+    def init(self):
+        if self.x0 is not None:
+            self.init_around(self.x0)
+            return
+        # latin hypercube sampling over the unit box
+        segsize = 1. / self.size
+        samples = segsize * self.rng.uniform(size=(self.size, self.n)) + np.linspace(0., 1., self.size, endpoint=False)[:, None]
+        self.population = np.zeros_like(samples)
+        for j in range(self.n):
+            self.population[:, j] = samples[self.rng.permutation(self.size), j]
+        self.energies = self._evaluate(self.population)
+        self._promote()
+
+    def init_around(self, x0):
+        # members around x0 in the unit box, keeping x0 itself as the first one
+        x0 = np.clip((np.asarray(x0, dtype=float) - self.lower) / (self.upper - self.lower), 0, 1)
+        self.population = np.clip(x0 + self.rng.normal(scale=self.spread, size=(self.size, self.n)), 0, 1)
+        self.population[0] = x0
+        self.energies = self._evaluate(self.population)
+        self._promote()
+
+    def _samples(self, n):
+        # n distinct members for every candidate, never the candidate itself
+        keys = self.rng.uniform(size=(self.size, self.size)) + np.eye(self.size)
+        return np.argsort(keys, axis=1)[:, :n]
+
+    def step(self):
+        scale = self.rng.uniform(*self.mutation) if np.size(self.mutation) == 2 else self.mutation
+        r = self._samples(2)
+        p = self.population
+        bprime = p[0] + scale * (p[r[:, 0]] - p[r[:, 1]])
+        crossovers = self.rng.uniform(size=p.shape) < self.recombination
+        crossovers[np.arange(self.size), self.rng.randint(self.n, size=self.size)] = True
+        trials = np.where(crossovers, bprime, p)
+        outside = (trials < 0) | (trials > 1)
+        trials[outside] = self.rng.uniform(size=np.count_nonzero(outside))
+
+        energies = self._evaluate(trials)
+        accepted = energies <= self.energies
+        self.population[accepted] = trials[accepted]
+        self.energies[accepted] = energies[accepted]
+        self._promote()
+        self.nit += 1
+
+    def stagnated(self):
+        # generations without the best cost improving on the last record by min_improvement
+        if self.energies[0] <= self.record - self.min_improvement:
+            self.record = self.energies[0]
+            self.stall = 0
+        else:
+            self.stall += 1
+        return self.patience is not None and self.stall >= self.patience
+
+    def converged(self):
+        if np.any(np.isinf(self.energies)):
+            return False
+        return np.std(self.energies) <= self.atol + self.tol * np.abs(np.mean(self.energies))
+
+    def solve(self):
+        self._started = time.time()
+        self.resumed = self.checkpoint is not None and self.load()
+        if self.resumed:
+            if self.disp:
+                print("differential_evolution resumed at step {}: f(x)= {:g}".format(self.nit, self.energies[0]))
+        else:
+            self.init()
+            self.record = self.energies[0]
+            self._checkpoint()
+            if self.callback is not None:
+                self.callback(self)
+        message = 'Maximum number of iterations has been exceeded.'
+        success = False
+        while self.nit < self.maxiter:
+            self.step()
+            stagnated = self.stagnated()
+            self._checkpoint()
+            if self.callback is not None:
+                self.callback(self)
+            if self.disp:
+                print("differential_evolution step {}: f(x)= {:g}".format(self.nit, self.energies[0]))
+            if self.converged():
+                message = 'Optimization terminated successfully.'
+                success = True
+                break
+            if stagnated:
+                message = 'Best cost has not improved for {} generations.'.format(self.stall)
+                success = True
+                break
+        if self.checkpoint is not None and os.path.exists(self.checkpoint):
+            os.remove(self.checkpoint)
+        x, fun = self._scale(self.population[0]), self.energies[0]
+        if self.polish:
+            res = scipy.optimize.minimize(
+                fun=lambda x: self.func(np.array([x]))[0],
+                x0=x,
+                method='L-BFGS-B',
+                bounds=np.column_stack([self.lower, self.upper]),
+            )
+            self.nfev += res.nfev
+            if res.fun < fun:
+                x, fun = res.x, res.fun
+        return scipy.optimize.OptimizeResult(
+            x=x,
+            fun=fun,
+            nit=self.nit,
+            nfev=self.nfev,
+            success=success,
+            message=message,
+            population=self._scale(self.population),
+            population_energies=self.energies,
+        )
+
+def evolution(func, bounds, seed=None, disp=False, **kwargs):
+    return DifferentialEvolution(func, bounds, seed=seed, disp=disp, **kwargs).solve()
+
+class Telemetry(object):
+    """Per-generation log of DifferentialEvolution written to a CSV file.
+
+    Each row has the generation, evaluations so far, best cost, spread of the costs and of the
+    population (mean deviation of coefficients scaled to the unit box), evaluations per second of the
+    generation and seconds spent solving. A fresh solve starts the log over; a solve resumed from its
+    checkpoint continues the log of the interrupted one, dropping the generations logged after the
+    checkpoint was saved, and counts evaluations and seconds on from the checkpoint.
+    """
+    COLUMNS = ('nit', 'nfev', 'best', 'cost_spread', 'spread', 'evals_per_sec', 'elapsed')
+
+    def __init__(self, filename):
+        self.filename = filename
+        self._opened = False
+
+    def _open(self, solver):
+        header = ','.join(self.COLUMNS) + '\n'
+        rows = []
+        if solver.resumed and os.path.exists(self.filename):
+            with open(self.filename) as f:
+                rows = [r for r in f.readlines()[1:] if int(r.split(',', 1)[0]) < solver.nit]
+        with open(self.filename, 'w') as f:
+            f.write(header)
+            f.writelines(rows)
+        self._opened = True
+
+    def __call__(self, solver):
+        if not self._opened:
+            self._open(solver)
+        finite = solver.energies[np.isfinite(solver.energies)]
+        row = (
+            solver.nit,
+            solver.nfev,
+            solver.energies[0],
+            np.std(finite) if len(finite) else np.nan,
+            np.std(solver.population, axis=0).mean(),
+            solver.rate,
+            solver.runtime(),
+        )
+        with open(self.filename, 'a') as f:
+            f.write('{:d},{:d},{:.6g},{:.6g},{:.6g},{:.6g},{:.3f}\n'.format(*row))
+
+def gradient(func, x, bounds, steps):
+    # cost and its central differences at x scored by func in a single (2N+1, N) batch, one-sided at bounds
+    x = np.asarray(x, dtype=float)
+    bounds = np.asarray(bounds, dtype=float)
+    n = len(x)
+    j = np.arange(n)
+    X = np.tile(x, (2*n + 1, 1))
+    X[1 + j, j] = np.minimum(x + steps, bounds[:, 1])
+    X[1 + n + j, j] = np.maximum(x - steps, bounds[:, 0])
+    costs = np.asarray(func(X), dtype=float)
+    d = X[1 + j, j] - X[1 + n + j, j]
+    with np.errstate(invalid='ignore'):
+        g = np.where(d > 0, (costs[1:n+1] - costs[n+1:]) / np.where(d > 0, d, 1.), 0.)
+    return costs[0], np.nan_to_num(g)
+
+class GridSearch(object):
+    """Exhaustive search over the points of `ranges` (slices as for scipy.optimize.brute) in chunks.
+
+    `func` scores an (S, N) matrix of points, never more than `chunksize` of them at once. With `subgrid`
+    scoring (S, M) costs of the M points of the sub-grid spanned by the K `inner` axes for (S, N-K) points
+    of the other axes (in C order of the inner axes), whole sub-grids are scored at once instead, for
+    `chunksize` outer points at a time.
+    """
+    def __init__(self, func, ranges, inner=(), subgrid=None, chunksize=4096, disp=False):
+        self.func = func
+        self.axes = [np.mgrid[r] if isinstance(r, slice) else np.asarray(r, dtype=float) for r in ranges]
+        self.inner = sorted(inner) if subgrid is not None else []
+        self.subgrid = subgrid
+        self.chunksize = chunksize
+        self.disp = disp
+        self.nfev = 0
+        self.x = None
+        self.fun = np.inf
+
+    @staticmethod
+    def _points(axes, flat):
+        # grid points (S, N) of flat indices in C order
+        index = np.unravel_index(flat, [len(a) for a in axes])
+        return np.column_stack([a[i] for a, i in zip(axes, index)])
+
+    def _evaluate(self, X):
+        self.nfev += len(X)
+        costs = np.asarray(self.func(X), dtype=float)
+        i = np.argmin(costs)
+        if costs[i] < self.fun:
+            self.x, self.fun = X[i], costs[i]
+
+    def _search(self):
+        size = int(np.prod([len(a) for a in self.axes]))
+        for s in range(0, size, self.chunksize):
+            self._evaluate(self._points(self.axes, np.arange(s, min(s + self.chunksize, size))))
+
+    def _search_inner(self):
+        outer = [j for j in range(len(self.axes)) if j not in self.inner]
+        outer_axes = [self.axes[j] for j in outer]
+        size = int(np.prod([len(a) for a in outer_axes]))
+        Y = self._points([self.axes[j] for j in self.inner], np.arange(int(np.prod([len(self.axes[j]) for j in self.inner]))))
+        for s in range(0, size, self.chunksize):
+            P = self._points(outer_axes, np.arange(s, min(s + self.chunksize, size)))
+            costs = np.asarray(self.subgrid(P), dtype=float).reshape(len(P), len(Y))
+            self.nfev += costs.size
+            p, y = np.unravel_index(np.argmin(costs), costs.shape)
+            if costs[p, y] < self.fun:
+                # best point laid out along the original axes
+                self.x = np.empty(len(self.axes))
+                self.x[outer], self.x[self.inner] = P[p], Y[y]
+                self.fun = costs[p, y]
+            if self.disp:
+                print("grid search {}/{}: f(x)= {:g}".format(s + len(P), size, self.fun))
+
+    def solve(self):
+        if self.inner:
+            self._search_inner()
+        else:
+            self._search()
+        return scipy.optimize.OptimizeResult(
+            x=self.x,
+            fun=self.fun,
+            nfev=self.nfev,
+            success=self.x is not None,
+        )
+
+def grid(func, ranges, disp=False, **kwargs):
+    return GridSearch(func, ranges, disp=disp, **kwargs).solve()
+
+class SurrogateSearch(object):
+    """Gaussian process surrogate of the cost choosing new points by expected improvement.
+
+    Points are scaled to the unit box of `bounds` as in DifferentialEvolution, starting from a latin
+    hypercube of `init` points; every step fits the surrogate to all points evaluated so far and scores
+    a batch of the candidates with the highest expected improvement until `budget` points are spent.
+    """
+    def __init__(self, func, bounds, seed=None, budget=None, init=None, batch=None, candidates=2048, disp=False):
+        self.func = func
+        bounds = np.asarray(bounds, dtype=float)
+        self.lower, self.upper = bounds[:, 0], bounds[:, 1]
+        self.n = len(bounds)
+        self.budget = 100 * self.n if budget is None else budget
+        self.init_size = min(10 * self.n if init is None else init, self.budget)
+        self.batch = max(2, self.n) if batch is None else batch
+        self.candidates = candidates
+        self.disp = disp
+        self.rng = np.random.RandomState(seed)
+        self.nit = 0
+        self.nfev = 0
+
+    def _scale(self, points):
+        return self.lower + points * (self.upper - self.lower)
+
+    def _evaluate(self, points):
+        self.nfev += len(points)
+        costs = np.asarray(self.func(self._scale(points)), dtype=float)
+        self.points = np.concatenate([self.points, points])
+        self.costs = np.concatenate([self.costs, costs])
+
+    def init(self):
+        # latin hypercube sampling over the unit box
+        segsize = 1. / self.init_size
+        samples = segsize * self.rng.uniform(size=(self.init_size, self.n)) + np.linspace(0., 1., self.init_size, endpoint=False)[:, None]
+        for j in range(self.n):
+            samples[:, j] = samples[self.rng.permutation(self.init_size), j]
+        self.points = np.zeros((0, self.n))
+        self.costs = np.zeros(0)
+        self._evaluate(samples)
+
+    @staticmethod
+    def _kernel(A, B, scales):
+        A, B = A / scales, B / scales
+        d2 = (A**2).sum(axis=1)[:, None] + (B**2).sum(axis=1)[None, :] - 2 * A.dot(B.T)
+        return np.exp(-np.clip(d2, 0, None) / 2)
+
+    def _likelihood(self, y, scales):
+        # squared distances of each coefficient between the points are computed once per fit
+        K = np.exp(-self._d2.dot(1. / scales**2) / 2) + 1e-3 * np.eye(len(y))
+        try:
+            L = np.linalg.cholesky(K)
+        except np.linalg.LinAlgError:
+            return -np.inf, None, None
+        alpha = scipy.linalg.cho_solve((L, True), y)
+        return -0.5 * y.dot(alpha) - np.log(np.diag(L)).sum(), L, alpha
+
+    def fit(self):
+        # squared exponential kernel on standardized log costs, which keeps the few huge errors from
+        # flattening the region of interest; length scales of each coefficient are searched one at a time
+        # for the highest marginal likelihood, and the nugget absorbs plateaus of the piecewise-constant cost
+        y = self.costs.copy()
+        finite = np.isfinite(y)
+        y[~finite] = y[finite].max() if finite.any() else 0.
+        y = np.log(np.clip(y, 1e-9, None))
+        self.mean, self.std = y.mean(), y.std() or 1.
+        y = (y - self.mean) / self.std
+        self._d2 = (self.points[:, None, :] - self.points[None, :, :])**2
+        scales = getattr(self, 'scales', np.full(self.n, 0.3))
+        best = self._likelihood(y, scales)
+        # length scales settle quickly; searched again only every few steps
+        for j in range(self.n if self.nit % 5 == 0 else 0):
+            for s in np.logspace(-2, 0.5, 6):
+                trial = scales.copy()
+                trial[j] = s
+                r = self._likelihood(y, trial)
+                if r[0] > best[0]:
+                    best, scales = r, trial
+        self.scales = scales
+        _, self.L, self.alpha = best
+        self.y = y
+
+    def predict(self, points):
+        # standardized mean and deviation of the surrogate
+        k = self._kernel(points, self.points, self.scales)
+        mu = k.dot(self.alpha)
+        v = scipy.linalg.solve_triangular(self.L, k.T, lower=True)
+        sigma = np.sqrt(np.clip(1. + 1e-3 - (v**2).sum(axis=0), 1e-12, None))
+        return mu, sigma
+
+    def improvement(self, points):
+        # expected improvement over the best cost so far
+        mu, sigma = self.predict(points)
+        d = self.y.min() - mu
+        z = d / sigma
+        return d * scipy.stats.norm.cdf(z) + sigma * scipy.stats.norm.pdf(z)
+
+    def propose(self, size):
+        # candidates sampled uniformly and around the best points, closer as the budget runs out, picked by
+        # expected improvement at least a little apart from each other
+        n = self.candidates // 2
+        best = self.points[np.argsort(self.costs)[:8]]
+        scale = 0.01 + 0.1 * (1. - self.nfev / self.budget)
+        local = best[self.rng.randint(len(best), size=n)] + self.rng.normal(scale=scale, size=(n, self.n))
+        C = np.clip(np.concatenate([self.rng.uniform(size=(n, self.n)), local]), 0, 1)
+        ei = self.improvement(C)
+        chosen = []
+        for i in np.argsort(-ei):
+            if len(chosen) == size:
+                break
+            if all(np.linalg.norm(C[i] - C[j]) > 1e-2 for j in chosen):
+                chosen.append(i)
+        return C[chosen]
+
+    def step(self):
+        self.fit()
+        self._evaluate(self.propose(min(self.batch, self.budget - self.nfev)))
+        self.nit += 1
+
+    def solve(self):
+        self.init()
+        while self.nfev < self.budget:
+            self.step()
+            if self.disp:
+                print("surrogate step {}: f(x)= {:g}".format(self.nit, self.costs.min()))
+        i = np.argmin(self.costs)
+        return scipy.optimize.OptimizeResult(
+            x=self._scale(self.points[i]),
+            fun=self.costs[i],
+            nit=self.nit,
+            nfev=self.nfev,
+            success=True,
+            message='Evaluation budget has been spent.',
+        )
+
+def surrogate(func, bounds, seed=None, disp=False, **kwargs):
+    return SurrogateSearch(func, bounds, seed=seed, disp=disp, **kwargs).solve()
+
+def local_search(func, simplex, bounds, maxiter):
+    # bounded Nelder-Mead continued from a simplex for up to maxiter iterations; returns the final simplex
+    # sorted by cost with its costs, evaluations spent and whether it converged
+    res = scipy.optimize.minimize(
+        fun=func,
+        x0=simplex[0],
+        method='Nelder-Mead',
+        bounds=bounds,
+        options={'initial_simplex': simplex, 'maxiter': maxiter},
+    )
+    points, costs = res.final_simplex
+    return points, costs, res.nfev, res.status == 0
+
+class MultiStart(object):
+    """Bounded local searches from latin hypercube starts run side by side in rounds.
+
+    `map` runs a list of local_search() argument tuples, (simplex, bounds, maxiter), and returns their
+    results, possibly in a process pool; `func` is only used by the default map in this process. Every
+    round continues each search for `round_maxiter` iterations, after which the worse half of the ones
+    still running is cancelled. Final points within `radius` of each other (in the unit box of bounds)
+    are reported as one basin.
+    """
+    def __init__(self, func, bounds, starts=None, seed=None, map=None, round_maxiter=None, maxrounds=10,
+                 simplex_size=0.1, radius=0.05, disp=False):
+        bounds = np.asarray(bounds, dtype=float)
+        self.bounds = bounds
+        self.lower, self.upper = bounds[:, 0], bounds[:, 1]
+        self.n = len(bounds)
+        self.starts = max(2, 4 * self.n if starts is None else starts)
+        self.rng = np.random.RandomState(seed)
+        self.map = map if map is not None else (lambda tasks: [local_search(func, *t) for t in tasks])
+        self.round_maxiter = 4 * self.n if round_maxiter is None else round_maxiter
+        self.maxrounds = maxrounds
+        self.simplex_size = simplex_size
+        self.radius = radius
+        self.disp = disp
+        self.nit = 0
+        self.nfev = 0
+
+    def _scale(self, points):
+        return self.lower + points * (self.upper - self.lower)
+
+    def _simplex(self, x):
+        # x and a step along every coefficient by a fraction of the bounds, backwards where it would leave them
+        simplex = np.tile(x, (self.n + 1, 1))
+        j = np.arange(self.n)
+        step = self.simplex_size * (self.upper - self.lower)
+        simplex[1 + j, j] = np.where(x + step <= self.upper, x + step, x - step)
+        return simplex
+
+    def init(self):
+        # latin hypercube sampling over the unit box
+        segsize = 1. / self.starts
+        samples = segsize * self.rng.uniform(size=(self.starts, self.n)) + np.linspace(0., 1., self.starts, endpoint=False)[:, None]
+        for j in range(self.n):
+            samples[:, j] = samples[self.rng.permutation(self.starts), j]
+        self.simplices = [self._simplex(x) for x in self._scale(samples)]
+        self.costs = [np.full(self.n + 1, np.inf) for _ in range(self.starts)]
+        # searches still running, and the ones cancelled as dominated
+        self.running = set(range(self.starts))
+        self.cancelled = set()
+
+    def step(self):
+        index = sorted(self.running)
+        results = self.map([(self.simplices[i], self.bounds, self.round_maxiter) for i in index])
+        for i, (points, costs, nfev, converged) in zip(index, results):
+            self.simplices[i], self.costs[i] = points, costs
+            self.nfev += nfev
+            if converged:
+                self.running.discard(i)
+        self.nit += 1
+
+        # the worse half of the searches still running cannot catch up with the better half
+        running = sorted(self.running, key=lambda i: self.costs[i][0])
+        if len(running) > 1:
+            dominated = running[(len(running) + 1) // 2:]
+            self.running -= set(dominated)
+            self.cancelled |= set(dominated)
+
+    def basins(self):
+        # final points grouped around the best ones within radius, with the best cost and count of each
+        order = np.argsort([c[0] for c in self.costs])
+        X = np.array([self.simplices[i][0] for i in order])
+        U = (X - self.lower) / (self.upper - self.lower)
+        basins = []
+        for k, i in enumerate(order):
+            for b in basins:
+                if np.linalg.norm(U[k] - b['center']) <= self.radius * np.sqrt(self.n):
+                    b['starts'] += 1
+                    break
+            else:
+                basins.append({'center': U[k], 'x': X[k], 'fun': self.costs[i][0], 'starts': 1})
+        return [{'x': b['x'], 'fun': b['fun'], 'starts': b['starts']} for b in basins]
+
+    def solve(self):
+        self.init()
+        while self.running and self.nit < self.maxrounds:
+            self.step()
+            if self.disp:
+                print("multistart round {}: f(x)= {:g}, {} running".format(self.nit, min(c[0] for c in self.costs), len(self.running)))
+        i = int(np.argmin([c[0] for c in self.costs]))
+        return scipy.optimize.OptimizeResult(
+            x=self.simplices[i][0],
+            fun=self.costs[i][0],
+            nit=self.nit,
+            nfev=self.nfev,
+            starts=self.starts,
+            cancelled=len(self.cancelled),
+            basins=self.basins(),
+            success=True,
+        )
+
+def multistart(func, bounds, seed=None, disp=False, **kwargs):
+    return MultiStart(func, bounds, seed=seed, disp=disp, **kwargs).solve()
+
+class EnsembleSampler(object):
+    """Affine-invariant ensemble sampler with the stretch move (Goodman and Weare, 2010).
+
+    `logp` receives an (S, N) matrix of points and returns S log densities, -inf where impossible. Walkers
+    are split in two halves and every step moves each half against the other in a single call, so the
+    cost of a step is two batched evaluations regardless of the number of walkers. Positions and log
+    densities of every step are kept in a (steps, walkers, N+1) float32 array, memory-mapped to the
+    `chain` file (.npy) if given.
+    """
+    def __init__(self, logp, x0, steps=1000, a=2., seed=None, chain=None, disp=False):
+        self.logp = logp
+        self.x0 = np.asarray(x0, dtype=float)
+        self.walkers, self.n = self.x0.shape
+        self.steps = steps
+        self.a = a
+        self.rng = np.random.RandomState(seed)
+        self.chain = chain
+        self.disp = disp
+        self.nit = 0
+        self.nfev = 0
+        self.accepted = np.zeros(self.walkers, dtype=int)
+
+    def _evaluate(self, X):
+        self.nfev += len(X)
+        L = np.asarray(self.logp(X), dtype=float)
+        return np.where(np.isnan(L), -np.inf, L)
+
+    def init(self):
+        self.X = self.x0.copy()
+        self.L = self._evaluate(self.X)
+        if self.chain is None:
+            self.samples = np.empty((self.steps, self.walkers, self.n + 1), dtype=np.float32)
+        else:
+            self.samples = np.lib.format.open_memmap(self.chain, mode='w+', dtype=np.float32, shape=(self.steps, self.walkers, self.n + 1))
+        # walkers of each half, moved along lines through walkers of the other
+        self.halves = [np.arange(0, self.walkers, 2), np.arange(1, self.walkers, 2)]
+
+    def step(self):
+        for k, c in (self.halves, self.halves[::-1]):
+            # stretch factors distributed as 1/sqrt(z) on [1/a, a]
+            z = ((self.a - 1.) * self.rng.uniform(size=len(k)) + 1.)**2 / self.a
+            C = self.X[self.rng.choice(c, len(k))]
+            Y = C + z[:, None] * (self.X[k] - C)
+            L = self._evaluate(Y)
+            with np.errstate(invalid='ignore'):
+                accept = np.log(self.rng.uniform(size=len(k))) < (self.n - 1) * np.log(z) + L - self.L[k]
+            self.X[k[accept]] = Y[accept]
+            self.L[k[accept]] = L[accept]
+            self.accepted[k[accept]] += 1
+        self.samples[self.nit, :, :-1] = self.X
+        self.samples[self.nit, :, -1] = self.L
+        self.nit += 1
+
+    @property
+    def acceptance(self):
+        return self.accepted / max(self.nit, 1)
+
+    def solve(self):
+        self.init()
+        while self.nit < self.steps:
+            self.step()
+            if self.disp and (self.nit % 100 == 0 or self.nit == self.steps):
+                print("ensemble step {}: log p= {:g}, acceptance {:.2f}".format(self.nit, self.L.max(), self.acceptance.mean()))
+        if isinstance(self.samples, np.memmap):
+            self.samples.flush()
+        # most probable point visited
+        t, w = np.unravel_index(np.argmax(self.samples[..., -1]), self.samples.shape[:2])
+        return scipy.optimize.OptimizeResult(
+            x=np.asarray(self.samples[t, w, :-1], dtype=float),
+            fun=float(self.samples[t, w, -1]),
+            chain=self.samples,
+            acceptance=self.acceptance,
+            nit=self.nit,
+            nfev=self.nfev,
+            success=True,
+        )
+
+def ensemble(logp, x0, seed=None, disp=False, **kwargs):
+    return EnsembleSampler(logp, x0, seed=seed, disp=disp, **kwargs).solve()
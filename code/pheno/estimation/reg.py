@@ -1,4 +1,4 @@
-from .base import Estimator
+from .base import Estimator, EstimationError
 
 import numpy as np
 import pandas as pd
@@ -20,6 +20,10 @@ class MonthlyRegressor(Estimator):
     def default_options(self):
         return {}
 
+    def _clip(self, year, coeff, skip_range_check=False):
+        # monthly resampling needs the original weather frame
+        return self._clip_frame(year, coeff, skip_range_check)
+
     def _calibrate(self, years, disp=True, **kwargs):
         opts = self.options(**kwargs)
 
@@ -37,12 +41,25 @@ class MonthlyRegressor(Estimator):
         coeff = self._dictify(m.params)
         return coeff
 
+    def _timestamp(self, met, t):
+        # already estimated as a timestamp, not an hour offset
+        return t
+
+    def _julian_at(self, met, t, year):
+        return self._julian(t.to_pydatetime(), year)
+
     def _estimate(self, year, met, coeff):
         T = met.tavg.resample('M')
         Ti = T.index
-        x = T[(Ti.year == year) & (Ti.month == self.month)].item()
+        try:
+            x = T[(Ti.year == year) & (Ti.month == self.month)].item()
+        except ValueError:
+            raise EstimationError("monthly temperature is not available for '{}'".format(year))
         y = coeff['b0'] + coeff['b1']*x
-        return pd.Timestamp(datetime.datetime.strptime('{}-{}'.format(year, int(round(y))), '%Y-%j').replace(hour=12))
+        try:
+            return pd.Timestamp(datetime.datetime.strptime('{}-{}'.format(year, int(round(y))), '%Y-%j').replace(hour=12))
+        except ValueError:
+            raise EstimationError("estimated day '{}' is out of range for '{}'".format(y, year))
 
 
 class February(MonthlyRegressor):
@@ -0,0 +1,277 @@
+import numpy as np
+import pandas as pd
+import datetime
+import hashlib
+import copy
+
+HOUR = pd.Timedelta(hours=1)
+
+def _localize(tz, t):
+    return t if tz is None else tz.localize(t)
+
+class Season(object):
+    """Hourly temperature of every season laid out as a (years x hours) array.
+
+    Each row starts at the local midnight of the earliest start date for the year and ends at 23:00 of
+    its end date. Hours missing from the weather are NaN in `tavg` and False in `mask`. A daily copy
+    (see `daily()`) has the same layout in steps of `step` hours instead, `steps` of them per day.
+    """
+    ARRAYS = ('tavg', 'mask', 'julian', 'openings', 'closings', 'levels', 'inverse', 'day', 'tmax', 'tmin', 'tmean')
+
+    def __init__(self, met, years, start_date, end_date):
+        self.shared = None
+        self.step = 1.
+        self.steps = 24
+        self.tz = met.index.tz
+        self.years = list(years)
+        self.rows = {y: i for i, y in enumerate(self.years)}
+        self.start_dates = [start_date(y) for y in self.years]
+        self.end_dates = [end_date(y) for y in self.years]
+
+        self.origins = [self._midnight(d) for d in self.start_dates]
+
+        # hour offsets of local midnight / 23:00 for every day in the season (DST aware)
+        def offsets(t0, d0, d1, hour):
+            n = (d1 - d0).days + 1
+            if self.tz is None:
+                return list(range(hour, 24*n, 24))
+            ts = [_localize(self.tz, datetime.datetime.combine(d0 + datetime.timedelta(days=i), datetime.time(hour))) for i in range(n)]
+            return [int((pd.Timestamp(t) - t0) // HOUR) for t in ts]
+        self.days = [max((d1 - d0).days + 1, 0) for d0, d1 in zip(self.start_dates, self.end_dates)]
+        days = max(self.days + [0])
+        self.openings = np.full((len(self.years), days), -1, dtype=int)
+        self.closings = np.full((len(self.years), days), -1, dtype=int)
+        for i, (t0, d0, d1) in enumerate(zip(self.origins, self.start_dates, self.end_dates)):
+            o = offsets(t0, d0, d1, 0)
+            self.openings[i, :len(o)] = o
+            self.closings[i, :len(o)] = offsets(t0, d0, d1, 23)
+
+        hours = self.closings.max(axis=1) + 1 if days else np.zeros(len(self.years), dtype=int)
+        self.hours = hours
+        width = int(hours.max()) if len(self.years) else 0
+        self.tavg = np.full((len(self.years), width), np.nan)
+        self.mask = np.zeros((len(self.years), width), dtype=bool)
+        for i, (t0, n) in enumerate(zip(self.origins, hours)):
+            s = met.tavg[t0:t0 + (n - 1) * HOUR]
+            h = np.asarray((s.index - t0) // HOUR, dtype=int)
+            self.tavg[i, h] = s.values
+            self.mask[i, h] = True
+
+        # distinct temperatures with the index of each hour into them; quantized records (0.1 C) only
+        # have a few hundred levels for which nonlinear responses need to be evaluated
+        self.levels, inverse = np.unique(self.tavg, return_inverse=True)
+        self.inverse = inverse.reshape(self.tavg.shape)
+
+        # day of every hour within its season (-1 beyond the end) and daily statistics over valid hours
+        self.day = np.full((len(self.years), width), -1, dtype=int)
+        self.tmax = np.full((len(self.years), days), np.nan)
+        self.tmin = np.full((len(self.years), days), np.nan)
+        self.tmean = np.full((len(self.years), days), np.nan)
+        for i, n in enumerate(self.days):
+            if n == 0:
+                continue
+            o = self.openings[i, :n]
+            self.day[i, :hours[i]] = np.repeat(np.arange(n), self.closings[i, :n] - o + 1)
+            t = self.tavg[i, :hours[i]]
+            valid = ~np.isnan(t)
+            count = np.add.reduceat(valid.astype(int), o)
+            with np.errstate(invalid='ignore', divide='ignore'):
+                self.tmax[i, :n] = np.where(count > 0, np.maximum.reduceat(np.where(valid, t, -np.inf), o), np.nan)
+                self.tmin[i, :n] = np.where(count > 0, np.minimum.reduceat(np.where(valid, t, np.inf), o), np.nan)
+                self.tmean[i, :n] = np.add.reduceat(np.where(valid, t, 0.), o) / count
+
+        # day of year for every hour as computed by Estimator._julian()
+        self.julian = np.full((len(self.years), width), np.nan)
+        for i, (y, t0) in enumerate(zip(self.years, self.origins)):
+            t = pd.date_range(t0, periods=width, freq=HOUR)
+            self.julian[i] = (t.year - y)*365 + t.dayofyear.astype(float) + t.hour/24. + t.minute/(24*60.) + t.second/(24*60*60.)
+
+    def _midnight(self, d):
+        return pd.Timestamp(_localize(self.tz, datetime.datetime.combine(d, datetime.time(0))))
+
+    def daily(self, samples=1):
+        # copy in days of a few steps each for daily resolution; a single step takes the daily mean while
+        # more steps sample the usual diurnal cycle from the daily extremes: a half cosine rising from the
+        # minimum at sunrise (6h) to the maximum at 14h, then falling over 16 hours to the minimum of the
+        # next sunrise (hours before sunrise fall from the maximum of the day before)
+        s = copy.copy(self)
+        s.shared = None
+        s.__dict__.pop('_fingerprint', None)
+        s.step = 24. / samples
+        s.steps = samples
+        n, days = self.tmax.shape
+        k = np.arange(samples)
+        if samples == 1:
+            T = self.tmean[..., None]
+        else:
+            def shift(a, d):
+                # values of the neighbouring days, the same day's where missing
+                b = np.roll(a, d, axis=1)
+                b[:, 0 if d > 0 else -1] = np.nan
+                return np.where(np.isnan(b), a, b)[..., None]
+            tmax, tmin = self.tmax[..., None], self.tmin[..., None]
+            h = 24. * k / samples
+            rising = tmin + (tmax - tmin) * (1 - np.cos(np.pi * (h - 6) / 8)) / 2
+            # falling from 14h, through midnight, to 6h of the next day
+            f = (1 + np.cos(np.pi * (np.where(h < 6, h + 24, h) - 14) / 16)) / 2
+            evening = shift(self.tmin, -1) + (tmax - shift(self.tmin, -1)) * f
+            morning = tmin + (shift(self.tmax, 1) - tmin) * f
+            T = np.where(h < 6, morning, np.where(h <= 14, rising, evening))
+        s.tavg = T.reshape(n, days*samples)
+        s.mask = ~np.isnan(s.tavg)
+        d = np.arange(days)
+        s.openings = np.where(self.openings >= 0, d*samples, -1)
+        s.closings = np.where(self.closings >= 0, d*samples + samples - 1, -1)
+        s.hours = np.array(self.days, dtype=int) * samples
+        s.levels, inverse = np.unique(s.tavg, return_inverse=True)
+        s.inverse = inverse.reshape(s.tavg.shape)
+        s.day = np.where(np.arange(days*samples) < s.hours[:, None], np.repeat(d, samples), -1)
+        midnight = np.take_along_axis(self.julian, np.clip(self.openings, 0, None), axis=1)
+        s.julian = (midnight[..., None] + k / samples).reshape(n, days*samples)
+        return s
+
+    def _filename(self, name):
+        return '{}.{}.npy'.format(self.shared, name)
+
+    def _attach(self):
+        for k in self.ARRAYS:
+            setattr(self, k, np.load(self._filename(k), mmap_mode='r'))
+
+    def share(self, basename):
+        # copy backed by memory-mapped files that worker processes attach to instead of unpickling arrays
+        s = copy.copy(self)
+        s.shared = basename
+        for k in self.ARRAYS:
+            np.save(s._filename(k), getattr(self, k))
+        s._attach()
+        return s
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        if self.shared:
+            for k in self.ARRAYS:
+                state.pop(k, None)
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        if self.shared:
+            self._attach()
+
+    @property
+    def fingerprint(self):
+        # digest of the weather and layout identifying the season across runs
+        try:
+            return self._fingerprint
+        except AttributeError:
+            h = hashlib.sha1(repr((self.years, self.start_dates, self.end_dates, str(self.tz), self.step)).encode())
+            h.update(np.ascontiguousarray(self.tavg).tobytes())
+            self._fingerprint = h.hexdigest()[:16]
+            return self._fingerprint
+
+    @property
+    def quantized(self):
+        # whether evaluating per level is much cheaper than per hour
+        return len(self.levels) * 16 <= self.tavg.size
+
+    def covers(self, year, date):
+        try:
+            i = self.rows[year]
+        except KeyError:
+            return True
+        return self.start_dates[i] <= date
+
+    def clip(self, year, start_date, end_date, skip_range_check=False):
+        try:
+            i = self.rows[year]
+        except KeyError:
+            raise IndexError("season is not available for '{}'".format(year))
+        d0 = (start_date - self.start_dates[i]).days
+        d1 = (end_date - self.start_dates[i]).days
+        if not 0 <= d0 <= d1 < self.days[i]:
+            raise IndexError("dates out of season: '{}' - '{}'".format(start_date, end_date))
+        h0 = self.openings[i, d0]
+        h1 = self.closings[i, d1]
+        if not skip_range_check:
+            assert self.mask[i, h0], "start date '{}' is missing".format(start_date)
+            assert self.mask[i, h1], "end date '{}' is missing".format(end_date)
+        return Clip(self, i, h0, h1 + 1)
+
+
+class Clip(object):
+    """A view on a single season row between the start and end date of an estimation."""
+    def __init__(self, season, row, start, stop):
+        self.season = season
+        self.row = row
+        self.start = start
+        self.stop = stop
+        self.tavg = season.tavg[row, start:stop]
+
+    def __len__(self):
+        return self.stop - self.start
+
+    @property
+    def step(self):
+        # hours per step
+        return self.season.step
+
+    @property
+    def origin(self):
+        return self.timestamp(0)
+
+    @property
+    def index(self):
+        if self.step == 1:
+            return pd.date_range(self.origin, periods=len(self), freq=HOUR, name='timestamp')
+        return pd.DatetimeIndex([self.timestamp(i) for i in range(len(self))], name='timestamp')
+
+    def timestamp(self, i):
+        # offsets may be fractional (continuous matching)
+        s = self.season
+        if s.step == 1:
+            return s.origins[self.row] + (self.start + float(i)) * HOUR
+        # local midnight of the day and the hours of earlier steps on it
+        d, k = divmod(self.start + float(i), s.steps)
+        return s._midnight(s.start_dates[self.row] + datetime.timedelta(days=int(d))) + float(k) * s.step * HOUR
+
+    @property
+    def day(self):
+        # day of every hour counted from the first day of the clip
+        d = self.season.day[self.row, self.start:self.stop]
+        return d - d[0]
+
+    def daily(self, name):
+        # daily statistics ('tmax', 'tmin' or 'tmean') for the days of the clip
+        s = self.season
+        d = s.day[self.row]
+        return getattr(s, name)[self.row, d[self.start]:d[self.stop - 1] + 1]
+
+    def hourly(self, values):
+        # daily values expanded to every hour (step) of their day
+        return np.asarray(values)[self.day]
+
+    def julian(self, i):
+        # linear between hours for fractional offsets (continuous matching)
+        J = self.season.julian[self.row]
+        k = int(np.ceil(i))
+        j = float(J[self.start + k])
+        return j if k == i else j - (k - i) * (j - float(J[self.start + k - 1]))
+
+    def offset(self, date):
+        # hours (steps) from the beginning of the clip to the local midnight of the date
+        s = self.season
+        return int(s.openings[self.row, (date - s.start_dates[self.row]).days]) - self.start
+
+    def midnights(self, date):
+        # offset() of every day from the first day of the clip up to the date
+        s = self.season
+        d0 = s.day[self.row, self.start]
+        return s.openings[self.row, d0:(date - s.start_dates[self.row]).days + 1] - self.start
+
+    def lookup(self, f):
+        # response evaluated once per distinct temperature of the season and gathered back for every hour
+        s = self.season
+        return f(s.levels)[s.inverse[self.row, self.start:self.stop]]
+
+    def series(self, values):
+        return pd.Series(values, index=self.index)
@@ -1,7 +1,7 @@
 from .base import Estimator
+from .kernel import accumulate
 
 import numpy as np
-import pandas as pd
 
 # Fu et al., 2012
 class SigmoidFunc(Estimator):
@@ -26,14 +26,32 @@ class SigmoidFunc(Estimator):
             'grid': (slice(-100, 100, 1), slice(-10, 30, 1), slice(-1.0, -0.1, 0.05), slice(0, 200, 1)),
         }
 
+    @property
+    def _vectorized(self):
+        return True
+
+    @property
+    def _requirement(self):
+        return 'Rd'
+
+    def _rates(self, T, coeffs):
+        Tb = coeffs['Tb'][:, None, None]
+        St = coeffs['St'][:, None, None]
+        def f(T):
+            return 1 / (1 + np.exp(St * (T - Tb)))
+        return np.clip(f(T), f(0), None) / 24
+
+    @property
+    def _features(self):
+        return {'D': ('sf', ['Tb', 'St'])}
+
     def _estimate(self, year, met, coeff):
+        c = self._feature(met, 'D', coeff)
+        if c is not None:
+            return self._match(c, coeff['Rd'])
         Tb = coeff['Tb']
         St = coeff['St']
         def f(T):
             return 1 / (1 + np.exp(St * (T - Tb)))
-        units = f(met.tavg).clip(lower=f(0)) / 24
-        aux = pd.concat({
-            'Dd': units,
-            'Cd': units.cumsum(),
-        }, axis=1)
-        return self._match(aux['Cd'], coeff['Rd'])
+        units = self._respond(met, lambda T: np.clip(f(T), f(0), None) / 24)
+        return self._match(accumulate(units), coeff['Rd'])
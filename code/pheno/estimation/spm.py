@@ -1,7 +1,7 @@
 from .base import Estimator, EstimationError
+from .kernel import accumulate, crossing
 
 import numpy as np
-import pandas as pd
 import datetime
 
 # Sarvas, 1974
@@ -43,8 +43,12 @@ class SequentialModel(Estimator):
         # fix the start date as October 1st
         return datetime.date(year-1, 10, 1)
 
-    def _chilling(self, met, coeff):
-        T = met.tavg
+    @property
+    def _vectorized(self):
+        return True
+
+    def _chill(self, coeff):
+        # chilling response f(T) of scalar coefficients or arrays broadcasting over weather
         # Tn, To, Tx = coeff['Tn'], coeff['To'], coeff['Tx']
         # if not Tn < To < Tx:
         #     raise EstimationError("chilling temperature out of order: Tn='{}' < To='{}' < Tx='{}'".format(Tn, To, Tx))
@@ -52,20 +56,45 @@ class SequentialModel(Estimator):
         Tn = To - Tnd
         Tx = To + Txd
 
-        Txu = Tx - T
-        Txl = Tx - To
-        Tnu = T - Tn
-        Tnl = To - Tn
-        c = (To - Tn) / (Tx - To)
-        r = (Txu/Txl)*(Tnu/Tnl).pow(c).fillna(0)
-        g = r.clip(lower=0) / 24
-        return g
-
-    def _forcing(self, met, coeff):
-        T = met.tavg
+        def f(T):
+            Txu = Tx - T
+            Txl = Tx - To
+            Tnu = T - Tn
+            Tnl = To - Tn
+            c = (To - Tn) / (Tx - To)
+            with np.errstate(invalid='ignore'):
+                p = np.power(Tnu/Tnl, c)
+            r = (Txu/Txl)*np.where(np.isnan(p), 0, p)
+            return np.clip(r, 0, None) / 24
+        return f
+
+    def _force(self, coeff):
         Tb = coeff['Tb']
         St = coeff['St']
-        return 1 / (1 + np.exp(St * (T - Tb))) / 24
+        return lambda T: 1 / (1 + np.exp(St * (T - Tb))) / 24
+
+    def _chilling(self, met, coeff):
+        return self._respond(met, self._chill(coeff))
+
+    def _forcing(self, met, coeff):
+        return self._respond(met, self._force(coeff))
+
+    @property
+    def _features(self):
+        return {'Dh': ('sm', ['Tb', 'St'])}
+
+    def _feature_response(self, response, coeff):
+        return self._force(coeff)
+
+    def _season_degrees(self, season, rows, a, b, coeffs, skip=()):
+        c = {k: v[:, None, None] for k, v in coeffs.items()}
+        degrees = {'Dc': self._chill, 'Dh': self._force}
+        return {k: self._season_response(season, rows, a, b, f(c)) for k, f in degrees.items() if k not in skip}
+
+    def _crossing(self, cumulative, outside, coeffs):
+        # forcing counts from the hour chilling reaches its requirement, as a difference of cumulative forcing
+        awakening = crossing(cumulative['Dc'], coeffs['Rc'][:, None], outside)
+        return crossing(cumulative['Dh'], coeffs['Rf'][:, None], outside, start=awakening, continuous=self.continuous)
 
     def _degrees(self, met, coeff):
         return {
@@ -80,8 +109,8 @@ class SequentialModel(Estimator):
         # rest & quiescence ends = dormancy release = bud burst
         Rc = coeff['Rc']
         try:
-            rest = chill.cumsum()
-            awakening = self._match(rest, Rc)
+            rest = accumulate(chill)
+            awakening = self._match(rest, Rc, continuous=False)
         except EstimationError as e:
             #HACK immature calibration with forced dormancy break
             # force dormancy release when spring comes
@@ -91,8 +120,10 @@ class SequentialModel(Estimator):
 
         # development after bud burst
         Rf = coeff['Rf']
-        development = heat.loc[awakening:].cumsum()
-        flowering = self._match(development, Rf)
+        development = self._feature(met, 'Dh', coeff)
+        if development is None:
+            development = accumulate(heat)
+        flowering = self._match(development, Rf, start=awakening)
         return flowering
 
 
@@ -119,13 +150,18 @@ class ParallelModel(SequentialModel):
         o['grid'] += (slice(0, 1, 0.1),)
         return o
 
+    @property
+    def _features(self):
+        # forcing is weighted by chilling of the same clip
+        return {}
+
     def _degrees(self, met, coeff):
         D = super(ParallelModel, self)._degrees(met, coeff)
         chill, heat = D['Dc'], D['Dh']
 
         Rc = coeff['Rc']
         Km = coeff['Km']
-        w = (chill.cumsum() / Rc).clip(upper=1)
+        w = np.clip(accumulate(chill) / Rc, None, 1)
         k = Km + (1 - Km)*w
         weighted_heat = k * heat
 
@@ -133,3 +169,15 @@ class ParallelModel(SequentialModel):
             'Dc': chill,
             'Dh': weighted_heat,
         }
+
+    def _cumulate(self, degrees, coeffs):
+        # forcing weighted by the chilling accumulated so far
+        chill = np.cumsum(degrees['Dc'], axis=-1, out=degrees['Dc'])
+        Rc = coeffs['Rc'][:, None, None]
+        Km = coeffs['Km'][:, None, None]
+        w = np.clip(chill / Rc, None, 1)
+        weighted_heat = (Km + (1 - Km)*w) * degrees['Dh']
+        return {
+            'Dc': chill,
+            'Dh': np.cumsum(weighted_heat, axis=-1, out=weighted_heat),
+        }
@@ -1,8 +1,6 @@
-from .base import Estimator, EstimationError
+from .base import Estimator, EstimationError, STATUS_OK, STATUS_NO_OBSERVATION, STATUS_NOT_REACHED
 
 import numpy as np
-import pandas as pd
-import datetime
 
 # Nizinski and Saugier, 1988
 # Fu et al., 2012
@@ -28,13 +26,104 @@ class ThermalPeriod(Estimator):
             'grid': (slice(-100, 100, 1), slice(0, 10, 0.1), slice(30, 100, 1), slice(0, 1000, 1)),
         }
 
-    def _estimate(self, year, met, coeff):
-        Tb = coeff['Tb']
-        units = (met.tavg - Tb).clip(lower=0) / 24
+    @property
+    def _requirement(self):
+        return 'Rd'
 
-        Dn = coeff['Dn']
-        offset = datetime.timedelta(days=int(Dn))
+    @property
+    def _resolution(self):
+        return {'Ds': int, 'Dn': int}
+
+    @property
+    def _vectorized(self):
+        return True
+
+    def _rates(self, T, coeffs):
+        Tb = coeffs['Tb'][:, None, None]
+        return np.clip(T - Tb, 0, None) / 24
+
+    @property
+    def _features(self):
+        # same response as GrowingDegree
+        return {'D': ('gd', ['Tb'])}
+
+    def _windows(self, year, met, coeff):
+        # forcing summed over each period sliding by a day, with hour offsets of the period ends
+        c = self._feature(met, 'D', coeff, missing=None)
+        if c is None:
+            c = np.cumsum(np.nan_to_num(self._respond(met, lambda T: np.clip(T - coeff['Tb'], 0, None) / 24)))
+        c = np.concatenate([[0.], c])
+        # periods run between local midnights, which are not a fixed number of hours apart across DST changes
+        o = met.midnights(self.end_date(year, coeff))
+        ld = o[int(coeff['Dn']):]
+        return c[ld] - c[o[:len(ld)]], ld
+
+    def _windows_batch(self, years, coeffs, size):
+        # period sums in chunks of (s, Y, K) from the cumulative rates, with julian days of the period ends
+        # and whether the period ends within the season
+        batch = self._season_batch(years, coeffs, size)
+        season, rows, h0, h1, _ = batch
+        valid, J, chunks = self._accumulate_batch(years, coeffs, size, batch)
+        if J is None:
+            return valid, iter(())
+
+        # periods run between local midnights of the season days (see _windows)
+        a = h0[valid].min()
+        d0 = season.day[rows, h0]
+        d1 = np.array([(self.end_date(y, {}) - season.start_dates[r]).days for y, r in zip(years, rows)], dtype=int)
+        days = np.array(season.days, dtype=int)[rows]
+        ed = np.where(valid.any(axis=0), np.clip(d1, 0, days - 1), -1)
+        n = np.trunc(coeffs['Dn']).astype(int)
+        steps = max(ed.max() - d0[valid].min() - n.min() + 1, 0)
+        y = np.arange(len(years))[:, None]
+
+        def windows():
+            for k, cumulative, outside in chunks:
+                sd = d0[k][..., None] + np.arange(steps)
+                ld = sd + n[k, None, None]
+                inside = (ld <= ed[:, None]) & valid[k, :, None]
+                def hour(d):
+                    # midnight of day d counted from hour a
+                    return np.where(inside, season.openings[rows[:, None], np.where(inside, d, 0)] - a, 0)
+                def at(i):
+                    # cumulative rates before hour i
+                    c = np.take_along_axis(cumulative, np.clip(i - 1, 0, cumulative.shape[-1] - 1), axis=-1)
+                    return np.where(i > 0, c, 0.)
+                ld = hour(ld)
+                yield k, at(ld) - at(hour(sd)), J[y, ld], inside
+        return valid, windows()
+
+    def _estimates_batch(self, years, coeffs):
+        R = np.asarray(coeffs['Rd'], dtype=float)
+        valid, windows = self._windows_batch(years, coeffs, len(R))
+        est = np.full(valid.shape, np.nan)
+        for k, f, J, inside in windows:
+            reached = (f >= R[k, None, None]) & inside
+            i = reached.argmax(axis=-1)[..., None]
+            found = np.take_along_axis(reached, i, axis=-1)[..., 0]
+            est[k] = np.where(found, np.take_along_axis(J, i, axis=-1)[..., 0], np.nan)
+        status = np.where(np.isnan(est), STATUS_NOT_REACHED, STATUS_OK)
+        status[~valid] = STATUS_NO_OBSERVATION
+        return est, status
+
+    def _requirement_curves(self, years, coeffs, size):
+        # period sums crossed at whole days
+        valid, windows = self._windows_batch(years, coeffs, size)
+        return valid, ((k, f, ~inside, J) for k, f, J, inside in windows), False
+
+    def _curves_batch(self, years, coeffs, size):
+        # running maximum of period sums makes a non-decreasing curve crossed at the same day as the periods
+        valid, windows = self._windows_batch(years, coeffs, size)
+        if not valid.any():
+            for s in range(size):
+                yield [None] * len(years)
+        for k, f, J, inside in windows:
+            for i, s in enumerate(range(k.start, k.stop)):
+                yield [(np.maximum.accumulate(f[i, y][inside[i, y]]), J[i, y][inside[i, y]]) if valid[s, y] else None for y in range(len(years))]
+
+    def _estimate(self, year, met, coeff):
         Rd = coeff['Rd']
+        Dn = coeff['Dn']
 
         # def check(sd, ld):
         #     f = units.loc[sd:ld].sum()
@@ -46,29 +135,9 @@ class ThermalPeriod(Estimator):
         #         return ld
         #raise EstimationError("requirement '{}' cannot be matched in '{}' days".format(Rd, Dn))
 
-        sd = pd.Timestamp(self.start_date(year, coeff))
-        ld = sd + offset
-        ed = pd.Timestamp(self.end_date(year, coeff))
-        ad = datetime.timedelta(days=1)
-
-        def unit(a, b):
-            return units.loc[a:b].sum() - units.loc[b]
-
-        def error():
+        # every period sum is a difference of the cumulative forcing
+        f, ld = self._windows(year, met, coeff)
+        reached = np.flatnonzero(f >= Rd)
+        if len(reached) == 0:
             raise EstimationError("requirement '{}' cannot be matched for '{}' days".format(Rd, Dn))
-
-        if ld > ed:
-            error()
-        f = unit(sd, ld)
-        if f >= Rd:
-            return ld
-
-        while True:
-            sd2, ld2 = sd + ad, ld + ad
-            if ld2 > ed:
-                error()
-            f -= unit(sd, sd2)
-            f += unit(ld, ld2)
-            sd, ld = sd2, ld2
-            if f >= Rd:
-                return ld
+        return int(ld[reached[0]])
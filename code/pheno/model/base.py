@@ -1,7 +1,7 @@
 from ..data import path
 
 from ..estimation.base import slugname
-from ..estimation.gd import GrowingDegree
+from ..estimation.gd import GrowingDegree, GrowingDegreeDay
 from ..estimation.cf import ChillingForce, ChillingForceDay
 from ..estimation.beta import BetaFunc
 from ..estimation.dts import StandardTemperature
@@ -13,11 +13,13 @@ from ..estimation.mean import Mean
 
 DEFAULT_ESTIMATORS = [
     GrowingDegree,
+    GrowingDegreeDay,
     SigmoidFunc,
     BetaFunc,
     StandardTemperature,
     ThermalPeriod,
     ChillingForce,
+    ChillingForceDay,
     SequentialModel,
     ParallelModel,
     AlternatingModel,
@@ -28,7 +30,7 @@ class Model(object):
     def __init__(self, dataset,
                  calibrate_years, validate_years, export_years,
                  crossvalidate_n=1, ESTIMATORS=DEFAULT_ESTIMATORS,
-                 output=None):
+                 output=None, resolution='hourly', features=False):
         self.dataset = dataset
 
         self.calibrate_years = calibrate_years
@@ -39,6 +41,8 @@ class Model(object):
         self.ESTIMATORS = ESTIMATORS
 
         self.output = path.output if output is None else output
+        self.resolution = resolution
+        self.features = features
 
         self.create()
 
@@ -49,17 +53,17 @@ class Model(object):
         raise NotImplementedError
 
     def _key_for_calibration(self):
-        return slugname(
+        return self._key_for_resolution(slugname(
             self.dataset.name,
             self.dataset.cultivar,
             self.dataset.met_station,
             self.dataset.obs_station,
             self.calibrate_years,
             self.dataset.stage,
-        )
+        ))
 
     def _key_for_validation(self):
-        return slugname(
+        return self._key_for_resolution(slugname(
             self.dataset.name,
             self.dataset.cultivar,
             self.dataset.met_station,
@@ -67,4 +71,8 @@ class Model(object):
             self.calibrate_years,
             self.validate_years,
             self.dataset.stage,
-        )
+        ))
+
+    def _key_for_resolution(self, key):
+        # keep results of hourly runs under their original names
+        return key if self.resolution == 'hourly' else slugname(key, self.resolution)
@@ -84,7 +84,7 @@ class ModelCollection(object):
         sdf = sdf.reset_index().set_index(['how', 'title', 'type'])
         return sdf
 
-    def show_crossvalidation(self, how='rmse', ignore_estimation_error=False, name=None):
+    def show_crossvalidation(self, how='rmse', ignore_estimation_error=False, name=None, dfs=None):
         def save(cdfs, kind):
             if not name:
                 return
@@ -95,7 +95,8 @@ class ModelCollection(object):
             cdfs.to_csv(filename)
 
         titles = self.names
-        dfs = [g.show_crossvalidation(how, ignore_estimation_error, '{}_{}'.format(name, how)) for g in self.groups]
+        if dfs is None:
+            dfs = [g.show_crossvalidation(how, ignore_estimation_error, '{}_{}'.format(name, how)) for g in self.groups]
         raw = pd.concat([self._crossvalidation_raw(t, d, how) for t, d in zip(titles, dfs)])
         save(raw, 'raw')
 
@@ -110,8 +111,10 @@ class ModelCollection(object):
 
     def show_crossvalidation_all(self, ignore_estimation_error=False, name=None):
         metrics = ['dr', 'rmse', 'd', 'ef', 'd1', 'ef1', 'me', 'mae', 'xe', 'm', 'r']
+        # crossvalidate every model once for all metrics
+        dfss = [g.show_crossvalidation_all(metrics, ignore_estimation_error, name) for g in self.groups]
         for how in metrics:
-            self.show_crossvalidation(how, ignore_estimation_error, name)
+            self.show_crossvalidation(how, ignore_estimation_error, name, dfs=[d[how] for d in dfss])
 
     def show_sensitivity(self, deltas, name=None):
         def raw(title, df):
@@ -30,7 +30,7 @@ class ModelGroup(base.Model):
                     self.dataset.copy().set(obs_station=o, cultivar=c),
                     self.calibrate_years, self.validate_years, self.export_years,
                     self.crossvalidate_n, self.ESTIMATORS,
-                    self.output,
+                    self.output, self.resolution, self.features,
                 )
             except ModelSuiteError as e:
                 return None
@@ -182,7 +182,16 @@ class ModelGroup(base.Model):
 
     def show_crossvalidation(self, how='rmse', ignore_estimation_error=False, name=None):
         df = pd.concat([s.show_crossvalidation(how, ignore_estimation_error, name) for s in self.suites])
+        return self._save_crossvalidation(df, how, ignore_estimation_error, name)
 
+    def show_crossvalidation_all(self, hows, ignore_estimation_error=False, name=None):
+        dfss = [s.show_crossvalidation_all(hows, ignore_estimation_error, name) for s in self.suites]
+        return OrderedDict(
+            (how, self._save_crossvalidation(pd.concat([d[how] for d in dfss]), how, ignore_estimation_error, '{}_{}'.format(name, how) if name else None))
+            for how in hows
+        )
+
+    def _save_crossvalidation(self, df, how, ignore_estimation_error, name):
         if name:
             cname = self._key_for_calibration()
             basename = '{}_{}_{}'.format(name, cname, how)
@@ -10,6 +10,7 @@ import multiprocessing as mp
 
 import itertools
 import json
+from collections import OrderedDict
 
 class ModelSuiteError(Exception):
     pass
@@ -22,7 +23,12 @@ class ModelSuite(base.Model):
         return self._models
 
     def _create(self):
-        models = [M(self.dataset) for M in self.ESTIMATORS]
+        # feature cache for every estimator, or only for the estimator classes named in a collection
+        def features(M):
+            if isinstance(self.features, (list, tuple, set, frozenset)):
+                return True if M.__name__ in self.features else None
+            return self.features or None
+        models = [M(self.dataset, resolution=self.resolution, features=features(M)) for M in self.ESTIMATORS]
 
         # calibration
         for m in models:
@@ -92,21 +98,26 @@ class ModelSuite(base.Model):
 
         self.save_param(name='{}_param'.format(cname))
 
+        if self.resolution != 'hourly':
+            self.show_resolution(self.calibrate_years, name='{}_resolution'.format(cname))
+
     def show_metric(self, years, name=None):
-        def metrics(how):
-            return [m.metric(years, how, ignore_estimation_error=True) for m in self.models]
+        hows = ['rmse', 'me', 'mae', 'xe', 'ef', 'ef1', 'd', 'd1', 'dr', 'r', 'm']
+        metrics = [m.metrics(years, hows, ignore_estimation_error=True) for m in self.models]
+        def column(how):
+            return [v[how] for v in metrics]
         df = pd.DataFrame({
-            'RMSE': metrics('rmse'),
-            'ME': metrics('me'),
-            'MAE': metrics('mae'),
-            'XE': metrics('xe'),
-            'EF': metrics('ef'),
-            'EF1': metrics('ef1'),
-            'D': metrics('d'),
-            'D1': metrics('d1'),
-            'Dr': metrics('dr'),
-            'R': metrics('m'),
-            'M': metrics('r'),
+            'RMSE': column('rmse'),
+            'ME': column('me'),
+            'MAE': column('mae'),
+            'XE': column('xe'),
+            'EF': column('ef'),
+            'EF1': column('ef1'),
+            'D': column('d'),
+            'D1': column('d1'),
+            'Dr': column('dr'),
+            'R': column('r'),
+            'M': column('m'),
         }, index=self.names)
         df.index.name = 'model'
 
@@ -137,6 +148,33 @@ class ModelSuite(base.Model):
             df.to_csv(filename)
         return df
 
+    def show_resolution(self, years=None, name=None):
+        # differences in days of daily resolution estimates from hourly ones with the calibrated coefficients
+        if years is None:
+            years = self.calibrate_years
+        models = [m for m in self.models if not isinstance(m, Ensemble)]
+
+        def summary(m):
+            df = m.compare_resolution(years)
+            e = np.ma.masked_invalid(df['difference'].values)
+            return OrderedDict([
+                ('ME', np.ma.mean(e)),
+                ('MAE', np.ma.mean(np.abs(e))),
+                ('XE', np.ma.max(np.abs(e))),
+                ('RMSE', np.ma.sqrt(np.ma.mean(e**2))),
+                # same day of year for both
+                ('Day', np.mean(np.floor(df['hourly']) == np.floor(df['daily']))),
+                # estimated by only one of them
+                ('Miss', int((df['hourly'].isnull() != df['daily'].isnull()).sum())),
+            ])
+        df = pd.DataFrame([summary(m) for m in models], index=[m.name for m in models])
+        df.index.name = 'model'
+
+        if name:
+            filename = self.output.outfilename('suite/results', name, 'csv')
+            df.to_csv(filename)
+        return df
+
     def show_prediction_multi(self, years, name=None):
         m0 = self.models[0]
         x = m0._years(years, skip_observation_check=True)
@@ -250,7 +288,19 @@ class ModelSuite(base.Model):
         v = itertools.starmap(self._show_crossvalidation, i)
 
         df = pd.DataFrame(dict(zip(k, v)), columns=k)
+        return self._save_crossvalidation(df, how, ignore_estimation_error, name)
 
+    def show_crossvalidation_all(self, hows, ignore_estimation_error=False, name=None):
+        # every metric from a single estimation per fold, saved as show_crossvalidation(how, name_how) would
+        k = self.names
+        v = [self._show_crossvalidation(m, self.calibrate_years, hows, ignore_estimation_error) for m in self.models]
+        dfs = OrderedDict()
+        for how in hows:
+            df = pd.DataFrame(dict(zip(k, [cv[how] for cv in v])), columns=k)
+            dfs[how] = self._save_crossvalidation(df, how, ignore_estimation_error, '{}_{}'.format(name, how) if name else None)
+        return dfs
+
+    def _save_crossvalidation(self, df, how, ignore_estimation_error, name):
         if name:
             cname = self._key_for_calibration()
             basename = '{}_{}_{}'.format(name, cname, how)
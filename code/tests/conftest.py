@@ -0,0 +1,54 @@
+import os
+import sys
+import datetime
+
+import numpy as np
+import pandas as pd
+import pytz
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from pheno.data.dataset import DataSet
+
+YEARS = (1990, 1997)
+
+class SyntheticDataSet(DataSet):
+    """Hourly weather with a seasonal and diurnal cycle, gaps and noise, and bloom dates around April."""
+    def __init__(self, tz='US/Eastern', years=YEARS, seed=0, noise=3.):
+        rng = np.random.RandomState(seed)
+        t = pd.date_range(datetime.datetime(years[0] - 1, 1, 1), datetime.datetime(years[1], 12, 31, 23), freq='h', name='timestamp')
+        if tz is not None:
+            t = t.tz_localize(pytz.timezone(tz), ambiguous='NaT', nonexistent='NaT')
+            t = t[~t.isna()]
+        d, h = t.dayofyear.values, t.hour.values
+        T = 12 - 14*np.cos(2*np.pi*(d - 15)/365.) + 5*np.sin(2*np.pi*(h - 9)/24.) + rng.normal(0, noise, len(t))
+        met = pd.DataFrame({'tavg': np.round(T, 1)}, index=t)
+        # a few hours missing from the record and a few more NaN
+        met = met[~((rng.uniform(size=len(met)) < 0.002) & (met.index.hour != 0))]
+        met.loc[rng.uniform(size=len(met)) < 0.002, 'tavg'] = np.nan
+        self.metdf = pd.concat({'S': met}, names=['station'])
+
+        y = list(range(years[0], years[1] + 1))
+        bloom = [pd.Timestamp(datetime.date(i, 1, 1) + datetime.timedelta(days=int(85 + rng.randint(-10, 10)))) for i in y]
+        bloom[3] = pd.NaT
+        index = pd.MultiIndex.from_product([['O'], ['C'], y], names=['station', 'cultivar', 'year'])
+        self.obsdf = pd.DataFrame({'Bloom': bloom}, index=index)
+
+        self.translator = {'O': 'S'}
+        self.store = None
+        self.met_name = self.obs_name = self.name = 'synthetic'
+        self.reset()
+
+@pytest.fixture(scope='session')
+def dataset():
+    return SyntheticDataSet()
+
+@pytest.fixture(scope='session')
+def dataset_smooth():
+    # hourly noise widens the daily range well beyond the diurnal cycle
+    return SyntheticDataSet(noise=0.3)
+
+@pytest.fixture(scope='session')
+def dataset_utc():
+    return SyntheticDataSet(tz=None)
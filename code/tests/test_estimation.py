@@ -0,0 +1,229 @@
+import numpy as np
+import pytest
+
+from pheno.estimation import (
+    GrowingDegree, GrowingDegreeDay, ChillingForce, ChillingForceDay, BetaFunc, StandardTemperature,
+    SigmoidFunc, ThermalPeriod, SequentialModel, ParallelModel, AlternatingModel,
+)
+from pheno.estimation.base import STATUS_OK, STATUS_NO_OBSERVATION, STATUS_NOT_REACHED, STATUS_INVALID_COEFF
+from pheno.estimation.feature import FeatureCache
+
+from conftest import YEARS
+
+ESTIMATORS = [
+    GrowingDegree, GrowingDegreeDay, ChillingForce, ChillingForceDay, BetaFunc, StandardTemperature,
+    SigmoidFunc, ThermalPeriod, SequentialModel, ParallelModel, AlternatingModel,
+]
+
+def samples(m, size, seed=0):
+    # coefficient sets drawn uniformly within bounds, as (S, N) and by name
+    b = np.array(m.options()['bounds'], dtype=float)
+    X = b[:, 0] + np.random.RandomState(seed).uniform(size=(size, len(b))) * (b[:, 1] - b[:, 0])
+    return X, {k: X[:, i] for i, k in enumerate(m.coeff_names)}
+
+def assert_batch_matches_single(m, size=6):
+    years = m._years(YEARS)
+    X, coeffs = samples(m, size)
+    batch = m._residuals_batch(years, coeffs)
+    single = np.ma.array([m.residuals(years, dict(zip(m.coeff_names, x))) for x in X])
+    np.testing.assert_array_equal(np.ma.getmaskarray(batch), np.ma.getmaskarray(single))
+    np.testing.assert_allclose(batch.filled(0), single.filled(0), rtol=0, atol=1e-9)
+    costs = m._costs(X, years, m.coeff_names, {})
+    rmse = [m.metric(years, 'rmse', dict(zip(m.coeff_names, x))) for x in X]
+    np.testing.assert_allclose(costs, rmse, rtol=1e-12)
+
+@pytest.mark.parametrize('E', ESTIMATORS, ids=lambda E: E.__name__)
+def test_batch_matches_single(dataset, E):
+    assert_batch_matches_single(E(dataset))
+
+@pytest.mark.parametrize('E', [GrowingDegree, SigmoidFunc, SequentialModel], ids=lambda E: E.__name__)
+def test_batch_matches_single_continuous(dataset, E):
+    assert_batch_matches_single(E(dataset, continuous=True))
+
+@pytest.mark.parametrize('E', [GrowingDegree, BetaFunc, ThermalPeriod, ChillingForce], ids=lambda E: E.__name__)
+def test_batch_matches_single_daily(dataset, E):
+    assert_batch_matches_single(E(dataset, resolution='daily'))
+
+def test_julian_estimates(dataset):
+    # julian days looked up from the season agree with the timestamps they stand for
+    m = GrowingDegree(dataset)
+    coeff = {'Ds': -40, 'Tb': 5, 'Rd': 60}
+    for y in m._years(YEARS):
+        assert m.estimate(y, coeff, julian=True) == pytest.approx(m._julian(m.estimate(y, coeff), y))
+
+def test_status(dataset):
+    m = BetaFunc(dataset)
+    years = m._years(YEARS, skip_observation_check=True) + [2050]
+    coeffs = {
+        'Ds': np.array([-40., -40., -40.]),
+        'Tx': np.array([35., 35., 10.]),
+        'To': np.array([20., 20., 20.]),
+        'Rg': np.array([20., 1e6, 20.]),
+    }
+    est, status = m._estimates_batch(years, coeffs)
+    assert (status[0, :-1] == STATUS_OK).all() and np.isfinite(est[0, :-1]).all()
+    assert (status[1, :-1] == STATUS_NOT_REACHED).all()
+    assert (status[2, :-1] == STATUS_INVALID_COEFF).all()
+    # no weather
+    assert (status[:, -1] == STATUS_NO_OBSERVATION).all()
+    assert np.isnan(est[status != STATUS_OK]).all()
+    # no observation of the fourth year
+    e = m._residuals_batch(years, coeffs)
+    assert e.mask[:, 3].all() and not e.mask[0, :3].any()
+
+def test_midnights(dataset):
+    # local midnights are 23 and 25 hours apart across DST changes
+    m = ThermalPeriod(dataset)
+    coeff = {'Ds': -100, 'Tb': 3, 'Dn': 60, 'Rd': 400}
+    met = m._clip(1995, coeff)
+    gaps = set(np.diff(met.midnights(m.end_date(1995, coeff))))
+    assert gaps == {23, 24, 25}
+    years = m._years(YEARS)
+    est = m.estimates(years, coeff, julian=True)
+    np.testing.assert_allclose(est % 1, 0)
+
+def test_feature_cache(dataset, tmp_path):
+    cache = FeatureCache(str(tmp_path))
+    m = SigmoidFunc(dataset, features=cache)
+    years = m._years(YEARS)
+    coeff = m._snapped({'Ds': -40, 'Tb': 5.03, 'St': 0.31, 'Rd': 30})
+    assert coeff['Tb'] == 5. and coeff['St'] == 0.3
+    cached = m.estimates(years, coeff, julian=True)
+    files = sorted(p.name for p in tmp_path.iterdir())
+    assert files
+    # another estimator (and cache) loads the same curves back
+    n = SigmoidFunc(dataset, features=FeatureCache(str(tmp_path)))
+    np.testing.assert_allclose(n.estimates(years, coeff, julian=True), cached)
+    assert sorted(p.name for p in tmp_path.iterdir()) == files
+    np.testing.assert_allclose(SigmoidFunc(dataset).estimates(years, coeff, julian=True), cached)
+
+def test_posterior(dataset, tmp_path):
+    m = GrowingDegree(dataset)
+    years = m._years(YEARS)
+    coeff = {'Ds': -40, 'Tb': 5, 'Rd': 60}
+    chain = str(tmp_path / 'chain.npy')
+    draws = m.calibrate_posterior(years, steps=20, walkers=8, coeff=coeff, chain=chain, disp=False)
+    assert draws.shape == (10 * 8, 4)
+    assert list(draws.columns) == ['Ds', 'Tb', 'Rd', 'logp']
+    stored = np.load(chain, mmap_mode='r')
+    assert stored.shape == (20, 8, 4) and stored.dtype == np.float32
+    b = np.array(m.options()['bounds'], dtype=float)
+    assert ((draws[m.coeff_names].values >= b[:, 0]) & (draws[m.coeff_names].values <= b[:, 1])).all()
+    est = m.posterior_estimates(YEARS)
+    assert est.shape == (len(draws), len(m._years(YEARS, skip_observation_check=True)))
+    single = [m.estimate_safely(1990, dict(d), julian=True) for d in draws[m.coeff_names].iloc[:5].to_dict('records')]
+    np.testing.assert_allclose(est[:5, 0], single)
+
+@pytest.mark.parametrize('E', [GrowingDegree, SigmoidFunc, BetaFunc, StandardTemperature, ThermalPeriod], ids=lambda E: E.__name__)
+def test_profile_bound(dataset, E):
+    # requirement profiled over its grid range does no worse than any of its grid values
+    m = E(dataset)
+    years = m._years(YEARS)
+    names = m.coeff_names
+    i = names.index(m._requirement)
+    R = np.mgrid[m.options()['grid'][i]][::10]
+    X, _ = samples(m, 20)
+    outer = np.delete(X, i, axis=1)
+    bound = m._profiles(outer, years, names[:i] + names[i+1:], {}, (m._requirement, R.min(), R.max()))[0]
+    costs = np.min([m._costs(np.insert(outer, i, r, axis=1), years, names, {}) for r in R], axis=0)
+    assert (bound <= costs + 1e-9).all()
+
+@pytest.mark.parametrize('E, kwargs', [
+    (GrowingDegree, {}), (GrowingDegree, {'continuous': True}), (GrowingDegree, {'resolution': 'daily'}),
+    (GrowingDegreeDay, {}), (SigmoidFunc, {}), (BetaFunc, {}), (StandardTemperature, {}), (ThermalPeriod, {}),
+], ids=lambda v: getattr(v, '__name__', None) or '-'.join(map(str, v.values())))
+def test_requirement_costs(dataset, E, kwargs):
+    # costs along the grid values of the requirement read off the same curves, as brute scores sub-grids
+    m = E(dataset, **kwargs)
+    years = m._years(YEARS)
+    names = m.coeff_names
+    i = names.index(m._requirement)
+    R = np.mgrid[m.options()['grid'][i]][::7]
+    X, _ = samples(m, 12)
+    outer = np.delete(X, i, axis=1)
+    costs = m._requirement_costs(outer, years, names[:i] + names[i+1:], {}, R)
+    expected = np.stack([m._costs(np.insert(outer, i, r, axis=1), years, names, {}) for r in R], axis=1)
+    np.testing.assert_allclose(costs, expected, rtol=1e-12)
+
+def test_brute(dataset):
+    m = GrowingDegree(dataset)
+    grid = (slice(-60, -20, 10), slice(3, 6, 1), slice(0, 200, 5))
+    coeff = m.calibrate(YEARS, method='brute', grid=grid, finish=False, disp=False, save=False)
+    X = np.mgrid[grid].reshape(3, -1).T
+    costs = m._costs(X, m._years(YEARS), m.coeff_names, {})
+    assert m.metric(YEARS, 'rmse', coeff) == pytest.approx(costs.min())
+
+def test_evolution_default(dataset, monkeypatch):
+    # scipy scores whole populations of a vectorized estimator, with the settings given
+    import scipy.optimize
+    calls = []
+    de = scipy.optimize.differential_evolution
+    def spy(*args, **kwargs):
+        calls.append(kwargs)
+        return de(*args, **kwargs)
+    monkeypatch.setattr(scipy.optimize, 'differential_evolution', spy)
+    m = GrowingDegree(dataset)
+    coeff = m.calibrate(YEARS, method='evolution', maxiter=3, popsize=4, polish=False, disp=False, save=False)
+    assert len(calls) == 1
+    assert calls[0]['vectorized'] and calls[0]['maxiter'] == 3 and calls[0]['popsize'] == 4 and not calls[0]['polish']
+    assert set(coeff) == set(m.coeff_names)
+
+def test_season_batch_once(dataset, monkeypatch):
+    # period sums reuse the season batch of the accumulation
+    m = ThermalPeriod(dataset)
+    calls = []
+    season_batch = m._season_batch
+    monkeypatch.setattr(m, '_season_batch', lambda *args: calls.append(args) or season_batch(*args))
+    X, coeffs = samples(m, 3)
+    m._estimates_batch(m._years(YEARS), coeffs)
+    assert len(calls) == 1
+
+def test_default_estimators(dataset, monkeypatch):
+    from pheno.model.base import DEFAULT_ESTIMATORS
+    models = [E(dataset) for E in DEFAULT_ESTIMATORS]
+    # results stored by preset() under one file stem per estimator, none extending another's
+    keys = [m._preset_key(YEARS) for m in models]
+    assert len(set(keys)) == len(keys)
+    assert not any(k.startswith(l + '_') for k in keys for l in keys)
+    # the daily variants calibrate on the batched path
+    for m in models:
+        if isinstance(m, (GrowingDegreeDay, ChillingForceDay)):
+            assert m._vectorized
+            costs = m._costs
+            calls = []
+            monkeypatch.setattr(m, '_costs', lambda X, *args, **kwargs: calls.append(X) or costs(X, *args, **kwargs))
+            coeff = m.calibrate(YEARS, method='evolution', maxiter=2, popsize=4, polish=False, disp=False, save=False)
+            assert calls and all(np.ndim(X) == 2 for X in calls)
+            assert np.isfinite(m.metric(YEARS, 'rmse', coeff))
+
+@pytest.mark.parametrize('E, coeff', [
+    (GrowingDegree, {'Ds': -40, 'Tb': 5, 'Rd': 60}),
+    (BetaFunc, {'Ds': -40, 'Tx': 30, 'To': 20, 'Rg': 20}),
+    (SigmoidFunc, {'Ds': -40, 'Tb': 8, 'St': 0.5, 'Rd': 30}),
+    (ThermalPeriod, {'Ds': -40, 'Tb': 5, 'Dn': 10, 'Rd': 60}),
+], ids=lambda v: getattr(v, '__name__', ''))
+def test_daily_resolution(dataset_smooth, E, coeff):
+    # the diurnal cycle sampled from daily extremes is coldest at sunrise and peaks in the afternoon
+    m = E(dataset_smooth, resolution='daily')
+    s = m._season()
+    T = s.tavg[:, :s.tmax.shape[1] * s.steps].reshape(len(s.years), -1, s.steps)
+    h = 24. * np.arange(s.steps) / s.steps
+    days = ~np.isnan(T).any(axis=-1)
+    assert (h[T.argmin(axis=-1)][days] == 6).all()
+    assert np.isin(h[T.argmax(axis=-1)][days], (12, 15)).all()
+    # and estimates within a couple of days of the hourly ones
+    e = m.compare_resolution(YEARS, coeff)['difference'].values
+    assert not np.isnan(e).any()
+    assert np.abs(e).mean() < 2 and np.abs(e).max() < 3
+
+def test_quantize(dataset):
+    # scored coefficients rounded to a tenth of their grid step, whole days for Ds
+    m = GrowingDegree(dataset)
+    opts = m.options()
+    precision = m._precision(m.coeff_names, opts['grid'])
+    assert precision == pytest.approx({'Ds': 0.1, 'Tb': 0.01, 'Rd': 0.1})
+    assert m._quantize([-40.7, 5.034, 60.26], m.coeff_names, precision) == (-40, 5.03, 60.3)
+    # revisits below the precision hit the memo and the result is as scored
+    coeff = m.calibrate(YEARS, method='nelder-mead', disp=False, save=False)
+    x = [coeff[k] for k in m.coeff_names]
+    assert m._quantize(x, m.coeff_names, precision) == tuple(x)
@@ -0,0 +1,153 @@
+import os
+
+import numpy as np
+
+from pheno.estimation import kernel, optimize
+
+BOUNDS = [(-5., 5.), (-5., 5.), (-5., 5.)]
+
+def sphere(X):
+    return np.sum((np.asarray(X) - 1.)**2, axis=-1)
+
+def test_checkpoint_resume(tmp_path):
+    checkpoint = str(tmp_path / 'de.npz')
+    full = optimize.evolution(sphere, BOUNDS, seed=1, maxiter=40)
+    # interrupted after a few generations with its state saved, then resumed from the file
+    solver = optimize.DifferentialEvolution(sphere, BOUNDS, seed=1, maxiter=40, checkpoint=checkpoint)
+    solver.init()
+    solver.record = solver.energies[0]
+    for _ in range(5):
+        solver.step()
+        solver.stagnated()
+    solver.save()
+    resumed = optimize.DifferentialEvolution(sphere, BOUNDS, seed=1, maxiter=40, checkpoint=checkpoint).solve()
+    np.testing.assert_array_equal(resumed.x, full.x)
+    assert resumed.nit == full.nit and resumed.nfev == full.nfev
+    assert not os.path.exists(checkpoint)
+
+def test_checkpoint_other_problem(tmp_path):
+    # a checkpoint of different bounds is not resumed
+    checkpoint = str(tmp_path / 'de.npz')
+    solver = optimize.DifferentialEvolution(sphere, BOUNDS, seed=1, checkpoint=checkpoint)
+    solver.init()
+    solver.save()
+    other = optimize.DifferentialEvolution(sphere, [(-4., 4.)] * 3, seed=1, checkpoint=checkpoint)
+    assert not other.load()
+
+def test_patience():
+    # a flat cost never improves
+    res = optimize.evolution(lambda X: np.ones(len(X)), BOUNDS, seed=1, patience=3, min_improvement=0.1, tol=0, atol=-1)
+    assert res.nit == 3
+    assert 'not improved' in res.message
+
+def test_warm_start():
+    x0 = np.array([1., 1., 1.])
+    solver = optimize.DifferentialEvolution(sphere, BOUNDS, seed=1, x0=x0, spread=0.05)
+    solver.init()
+    np.testing.assert_allclose(solver._scale(solver.population[0]), x0)
+    assert np.abs(solver._scale(solver.population) - x0).max() < 10 * 0.05 * 10
+    cold = optimize.evolution(sphere, BOUNDS, seed=1)
+    warm = optimize.evolution(sphere, BOUNDS, seed=1, x0=x0, spread=0.05)
+    assert warm.nit < cold.nit
+
+def test_telemetry(tmp_path):
+    log = str(tmp_path / 'log.csv')
+    res = optimize.evolution(sphere, BOUNDS, seed=1, maxiter=5, callback=optimize.Telemetry(log))
+    with open(log) as f:
+        rows = f.read().splitlines()
+    assert rows[0] == ','.join(optimize.Telemetry.COLUMNS)
+    assert [int(r.split(',')[0]) for r in rows[1:]] == list(range(res.nit + 1))
+    # a fresh solve starts the log over
+    res = optimize.evolution(sphere, BOUNDS, seed=2, maxiter=3, callback=optimize.Telemetry(log))
+    with open(log) as f:
+        rows = f.read().splitlines()
+    assert [int(r.split(',')[0]) for r in rows[1:]] == list(range(res.nit + 1))
+
+def test_telemetry_resume(tmp_path):
+    log = str(tmp_path / 'log.csv')
+    checkpoint = str(tmp_path / 'de.npz')
+    # interrupted two generations after its state was saved
+    solver = optimize.DifferentialEvolution(sphere, BOUNDS, seed=1, maxiter=10, checkpoint=checkpoint, callback=optimize.Telemetry(log))
+    solver.init()
+    solver.callback(solver)
+    for i in range(5):
+        solver.step()
+        solver.callback(solver)
+        if i == 2:
+            solver.elapsed = 100.
+            solver.save()
+    nfev = solver.nfev
+    # resumed with a new log that carries on from the checkpoint
+    resumed = optimize.DifferentialEvolution(sphere, BOUNDS, seed=1, maxiter=10, checkpoint=checkpoint, callback=optimize.Telemetry(log))
+    res = resumed.solve()
+    with open(log) as f:
+        rows = [r.split(',') for r in f.read().splitlines()[1:]]
+    assert [int(r[0]) for r in rows] == list(range(res.nit + 1))
+    nfevs = [int(r[1]) for r in rows]
+    assert nfevs == sorted(nfevs) and nfevs[-1] == res.nfev > nfev
+    assert all(float(r[-1]) >= 100. for r in rows[4:])
+
+def test_surrogate():
+    res = optimize.surrogate(sphere, BOUNDS, seed=1, budget=60)
+    assert res.nfev <= 60
+    assert res.fun < 0.5
+
+def test_multistart():
+    res = optimize.multistart(sphere, BOUNDS, seed=1)
+    np.testing.assert_allclose(res.x, 1., atol=1e-2)
+    assert res.basins[0]['fun'] == res.fun
+    assert sum(b['starts'] for b in res.basins) == res.starts
+
+def test_ensemble():
+    # standard normal around 1 sampled within a wide box
+    logp = lambda X: -0.5 * sphere(X)
+    x0 = 1. + np.random.RandomState(0).normal(scale=0.1, size=(16, 3))
+    res = optimize.ensemble(logp, x0, steps=400, seed=1)
+    assert res.chain.shape == (400, 16, 4)
+    samples = res.chain[200:, :, :-1].reshape(-1, 3)
+    np.testing.assert_allclose(samples.mean(axis=0), 1., atol=0.3)
+    np.testing.assert_allclose(samples.std(axis=0), 1., atol=0.3)
+    assert 0.2 < res.acceptance.mean() < 0.8
+
+def test_crossings():
+    # every value at once as crossing() finds each of them
+    rng = np.random.RandomState(0)
+    c = np.cumsum(rng.choice([-1, 0, 1, 2, 5], size=(3, 4, 30)), axis=-1).astype(float)
+    outside = rng.uniform(size=c.shape) < 0.3
+    values = rng.uniform(-3, 40, 20)
+    for continuous in (False, True):
+        expected = np.stack([kernel.crossing(c, np.full((3, 4), v), outside, continuous=continuous) for v in values], axis=-1)
+        np.testing.assert_allclose(kernel.crossings(c, values, outside, continuous=continuous), expected)
+
+def test_grid_subgrid():
+    # whole sub-grids of the last axis scored at once find the same optimum
+    ranges = (slice(-2, 3, 1), slice(-2, 3, 0.5), slice(0, 2, 0.25))
+    full = optimize.grid(sphere, ranges)
+    Z = np.mgrid[ranges[-1]]
+    res = optimize.grid(sphere, ranges, inner=[2], subgrid=lambda X: sphere(np.concatenate([np.repeat(X[:, None], len(Z), axis=1), np.broadcast_to(Z[:, None], (len(X), len(Z), 1))], axis=-1)), chunksize=7)
+    np.testing.assert_array_equal(res.x, full.x)
+    assert res.fun == full.fun and res.nfev == full.nfev
+
+def test_profile():
+    def sse(curves, obss, R):
+        e = [(j[np.searchsorted(c, R)] - o) if np.searchsorted(c, R) < len(c) else 365. for (c, j), o in zip(curves, obss)]
+        return np.sum(np.square(e))
+
+    # optimum at the upper bound
+    assert kernel.profile([([0, 10, 20, 30], [1, 2, 3, 4])], [3.], 0, 15, 365.)[0] == 0
+    # against a dense scan of the requirement
+    rng = np.random.RandomState(0)
+    for _ in range(300):
+        curves = [(np.cumsum(rng.choice([0, 1, 2, 5], n)).astype(float), np.arange(n) + 1. + rng.randint(3)) for n in rng.randint(0, 8, rng.randint(1, 5))]
+        obss = rng.uniform(0, 10, len(curves))
+        lower, upper = sorted(rng.uniform(-2, 25, 2))
+        e, R = kernel.profile(curves, obss, lower, upper, 365.)
+        assert lower <= R <= upper and np.isclose(e, sse(curves, obss, R))
+        assert e <= min(sse(curves, obss, r) for r in np.linspace(lower, upper, 2001)) + 1e-9
+
+def test_polish():
+    # refined locally from the best member as scipy does
+    rough = optimize.evolution(sphere, BOUNDS, seed=1, maxiter=3)
+    polished = optimize.evolution(sphere, BOUNDS, seed=1, maxiter=3, polish=True)
+    assert polished.fun < rough.fun and polished.nfev > rough.nfev
+    np.testing.assert_allclose(polished.x, 1., atol=1e-4)